@@ -0,0 +1,146 @@
+"""
+Benchmark: full-document scans vs server-side filtering/projection for the
+simple_db_calls exports.
+
+Seeds a synthetic invites collection (100k invites by default) and, for each
+export, compares the old approach - find({}) and filter in Python - with the
+export's own query and projection. Reports wall time, documents returned and
+the BSON bytes that would cross the wire.
+
+Runs against mongomock by default (pip install mongomock), or a real local
+mongod with --uri, e.g. --uri mongodb://localhost:27017 (uses a throwaway
+`bench_wedding` database, dropped afterwards).
+
+Usage (from python_server/):
+  python benchmarks/bench_db_queries.py [--invites 100000] [--uri mongodb://localhost:27017]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import bson
+import pymongo
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import mongo_connection
+import simple_db_calls
+
+STATUSES = ['', '', 'Canada Only', 'Australia Only', 'Both Australia and Canada', 'Not Attending']
+DIETARY = ['', '', '', 'none', 'N/A', 'Vegetarian', 'Gluten free', 'No nuts please']
+LOCATIONS = ['Canada', 'Australia', 'Both Australia and Canada']
+
+
+def make_client(uri):
+    if uri:
+        return pymongo.MongoClient(uri)
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("mongomock is not installed - pip install mongomock, or pass --uri for a local mongod")
+    return mongomock.MongoClient()
+
+
+def seed(collection, count):
+    rng = random.Random(42)
+    batch = []
+    for i in range(count):
+        batch.append({
+            'guests': [
+                {
+                    'firstName': f'Guest{i}_{g}',
+                    'lastName': f'Family{i}',
+                    'dietaryRequirements': rng.choice(DIETARY),
+                    'attendingStatus': rng.choice(STATUSES),
+                }
+                for g in range(rng.randint(1, 4))
+            ],
+            'hasRSVPd': rng.random() < 0.5,
+            'givenPlusOne': rng.random() < 0.2,
+            'invitedLocation': rng.choice(LOCATIONS),
+            'numGuestsOnBus': -1,
+            'numGuestsMorningBreakfast': -1,
+            'guestAccommodationAddress': '',
+            'guestAccommodationLocalName': '',
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def consume(export, invites):
+    """Feed invites to an export the way run_exports does; returns (docs, bytes, rows)"""
+    docs = wire_bytes = 0
+    export.start()
+    try:
+        for invite in invites:
+            docs += 1
+            wire_bytes += len(bson.encode(invite))
+            if not export.matches_location(invite.get('invitedLocation', 'Unknown')):
+                continue
+            for guest in invite.get('guests', []):
+                export.add(invite, guest)
+    finally:
+        export.finish()
+    return docs, wire_bytes, export.row_count
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark simple_db_calls export queries')
+    parser.add_argument('--invites', '-n', type=int, default=100_000)
+    parser.add_argument('--uri', help='MongoDB URI of a local mongod (default: mongomock)')
+    args = parser.parse_args()
+
+    client = make_client(args.uri)
+    db = client['bench_wedding']
+    collection = db['invites']
+    collection.drop()
+
+    print(f"Seeding {args.invites} invites...")
+    seed(collection, args.invites)
+
+    # Serve the benchmark client wherever the scripts ask for a connection
+    mongo_connection.use_client(client)
+
+    cases = [
+        ('dietary', simple_db_calls.dietary_export()),
+        ('rsvp canada', simple_db_calls.rsvp_export('canada')),
+        ('attending australia', simple_db_calls.attending_export('australia')),
+        ('all_invites canada', simple_db_calls.all_invites_export('canada')),
+    ]
+
+    print(f"\n{'export':<22}{'mode':<10}{'time':>9}{'docs':>10}{'MB':>9}{'rows':>9}")
+    out_dir = tempfile.mkdtemp(prefix='bench_db_queries_')
+    for name, export in cases:
+        export.filename = os.path.join(out_dir, os.path.basename(export.filename))
+        full_time, (full_docs, full_bytes, full_rows) = timed(lambda: consume(export, collection.find({})))
+
+        query = simple_db_calls.export_query([export])
+        projection = simple_db_calls.export_projection([export])
+        pushed_time, (pushed_docs, pushed_bytes, pushed_rows) = timed(
+            lambda: consume(export, collection.find(query, projection))
+        )
+
+        assert full_rows == pushed_rows, f"{name}: {full_rows} rows vs {pushed_rows} rows"
+        print(f"{name:<22}{'find({})':<10}{full_time:>8.2f}s{full_docs:>10}{full_bytes / 1e6:>9.1f}{full_rows:>9}")
+        print(f"{'':<22}{'pushed':<10}{pushed_time:>8.2f}s{pushed_docs:>10}{pushed_bytes / 1e6:>9.1f}{pushed_rows:>9}")
+
+    shutil.rmtree(out_dir)
+    client.drop_database('bench_wedding')
+
+
+if __name__ == '__main__':
+    main()
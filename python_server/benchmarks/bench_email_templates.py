@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: messages/sec for building invite emails.
+
+Compares the old per-row approach (template re-evaluated and the JPEG re-read
+and re-encoded for every message) with email_templates (template compiled once,
+image MIME part encoded once and shared).
+
+--serialize also flattens every message to bytes, as smtplib does at send
+time. Flattening walks the ~1.6MB base64 image body for every message on both
+paths, so it narrows the gap considerably.
+
+Usage (from python_server/):
+  python benchmarks/bench_email_templates.py [--messages 10000] [--serialize]
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from string import Template
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from email_templates import TEMPLATE_DIR, EmailTemplate, build_message, load_inline_image
+
+IMAGE_PATH = os.path.join(os.path.dirname(__file__), '..', 'images', 'nick_and_tash_cropped.jpg')
+SENDER = 'sender@example.com'
+SUBJECT = 'Invitation to Nicholas and Natasha’s Toronto Wedding Reception'
+
+
+def guest_values(i):
+    return {
+        'greeting': f'Guest {i} and Partner {i}',
+        'invite_link': f'https://nick-and-tash-wedding.web.app/invite/{i:024x}',
+        'google_link': f'https://www.google.com/calendar/render?action=TEMPLATE&text=Wedding&i={i}',
+        'apple_outlook_link': f'https://nick-and-tash-wedding.onrender.com/api/download-ics/{i:024x}',
+    }
+
+
+def build_legacy(n, serialize):
+    source = (TEMPLATE_DIR / 'invite_canada.html').read_text(encoding='utf-8')
+    for i in range(n):
+        html = Template(source).substitute(wedding_date='23 AUGUST 2025 | 5:00 PM EDT', **guest_values(i))
+        msg = MIMEMultipart('related')
+        msg['Subject'] = SUBJECT
+        msg['From'] = SENDER
+        msg['To'] = f'guest{i}@example.com'
+        msg.attach(MIMEText(html, 'html'))
+        with open(IMAGE_PATH, 'rb') as f:
+            img = MIMEImage(f.read())
+            img.add_header('Content-ID', '<wedding_photo>')
+            img.add_header('Content-Disposition', 'inline', filename="nick_and_tash.jpg")
+            msg.attach(img)
+        if serialize:
+            msg.as_bytes()
+
+
+def build_compiled(n, serialize):
+    template = EmailTemplate.from_file('invite_canada.html').partial(wedding_date='23 AUGUST 2025 | 5:00 PM EDT')
+    for i in range(n):
+        html = template.render(**guest_values(i))
+        msg = build_message(SENDER, [f'guest{i}@example.com'], SUBJECT, html,
+                            load_inline_image(IMAGE_PATH, 'wedding_photo'))
+        if serialize:
+            msg.as_bytes()
+
+
+def run(name, fn, n, serialize):
+    started = time.perf_counter()
+    fn(n, serialize)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {n:>7} messages  {elapsed:8.2f}s  {n / elapsed:10.1f} msg/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark email message building')
+    parser.add_argument('--messages', '-n', type=int, default=10_000)
+    parser.add_argument('--serialize', action='store_true', help='Also flatten each message to bytes')
+    args = parser.parse_args()
+
+    legacy = run('per-row template + image', build_legacy, args.messages, args.serialize)
+    compiled = run('compiled template + cache', build_compiled, args.messages, args.serialize)
+    print(f"\nSpeed-up: {legacy / compiled:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
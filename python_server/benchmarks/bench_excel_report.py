@@ -0,0 +1,92 @@
+"""
+Benchmark: RSVP report writers.
+
+Builds a synthetic RSVP summary (50k guests by default, split across the Yes,
+No and Not Responded tabs) and writes it with each report engine:
+
+  openpyxl     pandas + openpyxl, widths computed per column afterwards (the default)
+  xlsxwriter   xlsxwriter constant_memory, widths tracked while writing
+  csv          single CSV with an RSVP category column
+  parquet      single Parquet file (needs pyarrow)
+
+Reports rows/sec and peak Python heap (tracemalloc, measured in a second
+untimed run) for each. Engines whose
+library is not installed are skipped.
+
+Usage (from python_server/):
+  python benchmarks/bench_excel_report.py [--guests 50000]
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from generate_rsvp_report import ATTENDING_STATUSES, RSVP_CATEGORIES, write_report
+
+LOCATIONS = ['Canada', 'Australia', 'Both Australia and Canada']
+
+# name, write_report arguments, module the engine needs
+ENGINES = [
+    ('openpyxl', {'report_format': 'xlsx', 'engine': 'openpyxl'}, 'openpyxl'),
+    ('xlsxwriter', {'report_format': 'xlsx', 'engine': 'xlsxwriter'}, 'xlsxwriter'),
+    ('csv', {'report_format': 'csv'}, None),
+    ('parquet', {'report_format': 'parquet'}, 'pyarrow'),
+]
+
+
+def synthetic_summary(count):
+    rng = random.Random(42)
+    data = {category: [] for category in RSVP_CATEGORIES}
+    for i in range(count):
+        category = rng.choice(RSVP_CATEGORIES)
+        status = {'Yes': rng.choice(ATTENDING_STATUSES), 'No': 'Not Attending', 'Not Responded': ''}[category]
+        data[category].append({
+            'name': f'Guest{i} Family{i // 3}',
+            'status': status,
+            'location': rng.choice(LOCATIONS),
+            'inviteId': f'{i // 3:024x}',
+        })
+    return data
+
+
+def run(name, kwargs, data, count, out_dir):
+    # Timed and traced separately - tracemalloc slows allocation-heavy writers several-fold
+    started = time.perf_counter()
+    path = write_report(data, out_dir=os.path.join(out_dir, name, 'timed'), **kwargs)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    write_report(data, out_dir=os.path.join(out_dir, name, 'traced'), **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {elapsed:7.2f}s  {count / elapsed:10.0f} rows/s  "
+          f"peak {peak / 1e6:7.1f} MB  file {os.path.getsize(path) / 1e6:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RSVP report writers')
+    parser.add_argument('--guests', '-n', type=int, default=50_000)
+    args = parser.parse_args()
+
+    data = synthetic_summary(args.guests)
+    out_dir = tempfile.mkdtemp(prefix='bench_excel_report_')
+    try:
+        for name, kwargs, module in ENGINES:
+            if module and importlib.util.find_spec(module) is None:
+                print(f"{name:<12} skipped ({module} not installed)")
+                continue
+            run(name, kwargs, data, args.guests, out_dir)
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: guest-name parsing and dietary classification.
+
+Builds synthetic households (100k guests by default, one to four per
+household) and dietary answers drawn from the kind of free text guests type,
+then compares:
+
+  names     the old _parse_guests_with_last_names vs guest_normalization.parse_households
+            (also a per-household loop, which also drops blank names; expect parity)
+  dietary   re.sub + string ops per guest (the old is_meaningful_dietary)
+            vs guest_normalization.meaningful_dietary_mask (one lookup per distinct value)
+
+Both sides are checked to produce the same result before timing is reported.
+
+Usage (from python_server/):
+  python benchmarks/bench_guest_normalization.py [--guests 100000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from guest_normalization import EXCLUDE_DIETARY, is_meaningful_dietary, meaningful_dietary_mask, parse_households
+
+FIRST_NAMES = ['Nick', 'Tash', 'Olivia', 'Liam', 'Charlotte', 'Noah', 'Amelia', 'Jack', 'Mia', 'William']
+LAST_NAMES = ['Smith', 'Nguyen', 'Van Der Berg', 'Jones', 'Williams', 'Brown', 'Wilson', 'Taylor']
+DIETARY = ['', '', '', 'None', 'none', 'N/A', 'no', 'Nope!', 'Nil', 'No restrictions', 'Vegetarian',
+           'vegan', 'Gluten free', 'Coeliac', 'Nut allergy', 'Lactose intolerant', 'Pescatarian']
+
+
+def legacy_parse(guests):
+    """_parse_guests_with_last_names before guest_normalization"""
+    explicit_last_names = set()
+    for guest in guests:
+        name_parts = guest.split()
+        if len(name_parts) > 1:
+            explicit_last_names.add(' '.join(name_parts[1:]))
+    shared_last_name = next(iter(explicit_last_names)) if len(explicit_last_names) == 1 else None
+    guest_data = []
+    for guest in guests:
+        name_parts = guest.split()
+        last_name = ' '.join(name_parts[1:]) if len(name_parts) > 1 else (shared_last_name or '')
+        guest_data.append({'firstName': name_parts[0], 'lastName': last_name,
+                           'dietaryRequirements': '', 'attendingStatus': ''})
+    return guest_data
+
+
+def legacy_is_meaningful_dietary(val):
+    """is_meaningful_dietary before guest_normalization"""
+    cleaned = re.sub(r'[^a-zA-Z0-9 ]', '', val).strip().lower().replace(' ', '')
+    return cleaned and cleaned not in EXCLUDE_DIETARY
+
+
+def synthetic_guests(count):
+    rng = random.Random(42)
+    households, dietary = [], []
+    while len(dietary) < count:
+        surname = rng.choice(LAST_NAMES)
+        size = rng.randint(1, 4)
+        names = []
+        for i in range(size):
+            first = rng.choice(FIRST_NAMES)
+            # Usually only the last guest carries the surname ("Nick, Tash Smith")
+            names.append(f'{first} {surname}' if i == size - 1 or rng.random() < 0.2 else first)
+        households.append(', '.join(names))
+        dietary.extend(rng.choice(DIETARY) for _ in names)
+    return pd.Series(households), pd.Series(dietary[:count])
+
+
+def timed(function, *args, repeat=5):
+    """(result, best time of `repeat` runs); best-of, as timeit.repeat advises on a noisy machine"""
+    best = float('inf')
+    for _ in range(repeat):
+        # Collector off while timing, as timeit does: both sides allocate 100k+ dicts
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = function(*args)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return result, best
+
+
+def report(name, count, legacy_seconds, new_seconds):
+    print(f"{name:<8} legacy {legacy_seconds:7.3f}s ({count / legacy_seconds:10.0f}/s)  "
+          f"new {new_seconds:7.3f}s ({count / new_seconds:10.0f}/s)  "
+          f"x{legacy_seconds / new_seconds:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch guest normalization')
+    parser.add_argument('--guests', '-n', type=int, default=100_000)
+    args = parser.parse_args()
+
+    households, dietary = synthetic_guests(args.guests)
+    guest_count = int(households.str.count(',').sum() + len(households))
+    print(f"{len(households)} households, {guest_count} guests, {dietary.nunique()} distinct dietary answers")
+
+    legacy, legacy_seconds = timed(lambda: [legacy_parse(h.split(',')) for h in households])
+    parsed, parsed_seconds = timed(parse_households, households)
+    assert legacy == parsed.tolist(), "name parsing differs"
+    report('names', guest_count, legacy_seconds, parsed_seconds)
+
+    legacy, legacy_seconds = timed(lambda: [bool(legacy_is_meaningful_dietary(d)) for d in dietary])
+
+    def cold_mask(values):
+        is_meaningful_dietary.cache_clear()  # time a cold lookup table
+        return meaningful_dietary_mask(values)
+    mask, mask_seconds = timed(cold_mask, dietary)
+    assert legacy == mask.tolist(), "dietary classification differs"
+    report('dietary', len(dietary), legacy_seconds, mask_seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark: batch ICS generation for thousands of invites.
+
+Renders a personalised calendar per synthetic invite (a mix of Canada,
+Australia and both) and writes them as individual files and as a zip archive.
+
+Usage (from python_server/):
+  python benchmarks/bench_ics.py [--invites 10000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from create_ics import LOCATION_EVENTS, generate_invite_calendars
+
+
+def synthetic_invites(count):
+    rng = random.Random(42)
+    locations = list(LOCATION_EVENTS)
+    return [{'_id': f'{i:024x}', 'invitedLocation': rng.choice(locations)} for i in range(count)]
+
+
+def run(name, fn, n):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<16} {n:>7} calendars  {elapsed:7.2f}s  {n / elapsed:10.1f} calendars/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch ICS generation')
+    parser.add_argument('--invites', '-n', type=int, default=10_000)
+    args = parser.parse_args()
+
+    invites = synthetic_invites(args.invites)
+    out_dir = tempfile.mkdtemp(prefix='bench_ics_')
+    try:
+        run('files', lambda: generate_invite_calendars(invites, out_dir=os.path.join(out_dir, 'files')), args.invites)
+        zip_path = os.path.join(out_dir, 'calendars.zip')
+        run('zip archive', lambda: generate_invite_calendars(invites, zip_path=zip_path), args.invites)
+        print(f"\nzip size: {os.path.getsize(zip_path) / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,845 @@
+"""
+Campaign engine for the wedding email senders.
+
+A campaign is a JSON spec in ./campaigns (see invites_canada.json and
+save_the_date_australia.json) and runs through one shared pipeline:
+
+  audience     CSV (Guests, email, optional plus one) or a MongoDB query
+  pre-flight   invite_ingest validation and dedup; guests already invited are
+               dropped when the campaign creates invites
+  invites      optionally created per household through the API (one at a
+               time or in bulk)
+  emails       rendered from a precompiled template, sent over pooled SMTP
+               sessions by concurrent workers, with an adaptive rate limit
+               and delayed retries (throttle, smtp_pool)
+  journal      every step recorded in a send_journal, so a rerun resumes where
+               the last one stopped; the results CSV is written from it
+
+Spec fields:
+  name              campaign name (default: the spec's file name); used for the
+                    default journal, log file and results CSV names
+  template          HTML template in ./templates
+  template_values   placeholders that are the same for every guest
+  subject           email subject
+  image             {"path": ..., "content_id": ...} inline image (optional)
+  audience          {"csv": path} or {"mongo": {"collection": "invites", "query": {...},
+                    "emails_from": journal .jsonl or results .csv}}; MongoDB invites
+                    don't store addresses, so they come from the documents' 'emails'
+                    field or the results of the campaign that created the invites
+  invites           {"location": "Canada"} to create an invite per household (optional)
+  calendar          {"event": create_ics event key, "ics_link": ..., "description": ...,
+                    "google_params": {...}} for the Google / Apple calendar links;
+                    ics_link and description may use {invite_id}, {invite_link}, {ics_link}
+  rate_limits       invite_rate, email_rate, email_max_rate, max_email_attempts
+  concurrency, bulk_create, bulk_chunk_size, output_prefix, log_file
+
+Per-guest template values: greeting, invite_link, google_link, apple_outlook_link.
+
+Usage (from python_server/, with .env):
+  python campaign.py campaigns/invites_canada.json [--concurrency 4] [--bulk-create]
+                     [--email-rate 1] [--preflight-only] [--journal PATH] ...
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+import pandas as pd
+import requests
+from bson import json_util
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from create_ics import EVENTS, event_times_utc
+from email_templates import EmailTemplate, build_message, load_inline_image
+from guest_normalization import parse_household, parse_households
+from invite_ingest import ingest_invites, load_invite_csv
+from send_journal import SendJournal, household_key
+from smtp_pool import RETRYABLE, SENT, SMTPPool, classify_smtp_error
+from throttle import AdaptiveRateLimiter, QuotaExceeded, RateLimiter, RetryQueue, SendMetrics
+
+API_URL = 'https://nick-and-tash-wedding.onrender.com'
+WEBSITE_URL = 'https://nick-and-tash-wedding.web.app'
+GOOGLE_CALENDAR_URL = "https://www.google.com/calendar/render?"
+CAMPAIGN_DIR = Path(__file__).parent / 'campaigns'
+OUTPUT_DIR = './out_sent_invites'
+
+# Filled in per guest; everything else in a template must come from template_values
+ROW_PLACEHOLDERS = {'greeting', 'invite_link', 'google_link', 'apple_outlook_link'}
+
+SPEC_FIELDS = {
+    'name', 'template', 'template_values', 'subject', 'image', 'audience', 'invites', 'calendar',
+    'rate_limits', 'concurrency', 'bulk_create', 'bulk_chunk_size', 'output_prefix', 'log_file',
+}
+RATE_LIMIT_FIELDS = {'invite_rate', 'email_rate', 'email_max_rate', 'max_email_attempts'}
+
+
+class EmailManager:
+    def __init__(self, email_address, email_password, pool_size=3, image_content_id='wedding_photo'):
+        self.email_address = email_address
+        self.email_password = email_password
+        self.smtp_server = "smtp.gmail.com"
+        self.smtp_port = 587
+        self.image_content_id = image_content_id
+        # Authenticated sessions are kept open and reused across messages
+        self.pool = SMTPPool(
+            self.smtp_server,
+            self.smtp_port,
+            email_address,
+            email_password,
+            size=pool_size
+        )
+        self.metrics = SendMetrics()
+
+    def deliver(self, to_addresses, subject, html_content, image_path=None):
+        """
+        Sends an HTML email with an embedded image. Returns (outcome, error):
+        outcome is one of the smtp_pool outcomes (SENT, THROTTLED, QUOTA,
+        TRANSIENT, PERMANENT) and error the failure text, or None once sent.
+        """
+        # The image part is read and encoded once, then shared by every message
+        msg = build_message(
+            self.email_address,
+            to_addresses,
+            subject,
+            html_content,
+            load_inline_image(image_path, self.image_content_id)
+        )
+
+        # Send email over a pooled session
+        try:
+            self.pool.send_message(msg)
+        except Exception as e:
+            outcome = classify_smtp_error(e)
+            self.metrics.record(outcome)
+            logging.error(f"Failed to send email to {to_addresses} ({outcome}): {str(e)}")
+            return outcome, str(e)
+        self.metrics.record(SENT)
+        logging.info(f"Successfully sent email to {to_addresses}")
+        return SENT, None
+
+    def send_email(self, to_addresses, subject, html_content, image_path=None):
+        """Sends an HTML email with an embedded image; True if it was sent"""
+        outcome, _ = self.deliver(to_addresses, subject, html_content, image_path)
+        return outcome == SENT
+
+    def close(self):
+        """Logs the run's send metrics and per-session throughput, and closes the pooled SMTP sessions"""
+        self.metrics.log()
+        self.pool.log_stats()
+        self.pool.close()
+
+class BulkInviteError(Exception):
+    """Raised when a bulk create fails part way; invite_ids holds the IDs created before the failure"""
+    def __init__(self, message, invite_ids):
+        super().__init__(message)
+        self.invite_ids = invite_ids
+
+def generate_invite_link(invite_id):
+    """Generates the full invite link for the given invite ID"""
+    return f"{WEBSITE_URL}/invite/{invite_id}"
+
+class WeddingInviteManager:
+    def __init__(self, api_url=API_URL, pool_size=10):
+        self.api_url = api_url
+        self.base_website = WEBSITE_URL
+        self.session = self._build_session(pool_size)
+
+    @staticmethod
+    def _build_session(pool_size):
+        """
+        Keep-alive session shared by every API call, so invites reuse one TCP+TLS
+        connection per worker instead of reconnecting to Render each time.
+        Connection errors are retried with backoff for every request, since nothing
+        reached the server. 429/502/503 (Render cold starts) and read timeouts are
+        only retried for GETs: a POST may already have created its invites, and
+        resending it would create them twice.
+        """
+        retry = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 502, 503],
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.headers.update({'Content-Type': 'application/json'})
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _parse_guests_with_last_names(self, guests):
+        """
+        Parse the guest list to determine if a shared last name should be applied.
+        Returns a list of dictionaries with firstName and lastName for each guest.
+        """
+        return parse_household(guests)
+
+    def _build_invite_payload(self, guests, given_plus_one=False, location='Canada', guest_data=None):
+        if guest_data is None:
+            guest_data = self._parse_guests_with_last_names(guests)
+
+        # Log the parsed guest data for debugging
+        logging.info(f"Parsed guest data: {json.dumps(guest_data, indent=2)}")
+
+        return {
+            'guests': guest_data,
+            'givenPlusOne': given_plus_one,
+            'invitedLocation': location
+        }
+
+    def create_invite(self, guests, given_plus_one=False, location='Canada'):
+        """Creates an invite through the API and returns the invite ID"""
+        payload = self._build_invite_payload(guests, given_plus_one, location)
+
+        try:
+            response = self.session.post(f'{self.api_url}/api/invites', json=payload)
+            response.raise_for_status()
+            return response.json()['_id']
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to create invite for {guests}: {str(e)}")
+            raise
+
+    def create_invites_bulk(self, households, chunk_size=100, on_created=None):
+        """
+        Creates many invites through the bulk API and returns their IDs in order.
+
+        households is a list of dicts with 'guests' and optionally 'given_plus_one',
+        'location' and 'guest_data' (already parsed guests, see
+        guest_normalization.parse_households). Invites are sent in chunks of chunk_size (the server accepts
+        at most 200 per request). If a chunk fails, BulkInviteError is raised with
+        the IDs of every invite created by the earlier chunks. on_created, if given,
+        is called with (offset, ids) as soon as each chunk's invites exist.
+        """
+        invite_ids = []
+        for start in range(0, len(households), chunk_size):
+            chunk = households[start:start + chunk_size]
+            payload = {
+                'invites': [
+                    self._build_invite_payload(
+                        h['guests'],
+                        h.get('given_plus_one', False),
+                        h.get('location', 'Canada'),
+                        h.get('guest_data')
+                    )
+                    for h in chunk
+                ]
+            }
+
+            try:
+                response = self.session.post(f'{self.api_url}/api/invites/bulk', json=payload)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Failed to create invites {start + 1}-{start + len(chunk)}: {str(e)}")
+                raise BulkInviteError(str(e), invite_ids) from e
+
+            ids = response.json()['ids']
+            if on_created:
+                on_created(start, ids)
+            invite_ids.extend(ids)
+            logging.info(f"Created {len(invite_ids)}/{len(households)} invites")
+
+        return invite_ids
+
+    def generate_invite_link(self, invite_id):
+        """Generates the full invite link for the given invite ID"""
+        return generate_invite_link(invite_id)
+
+def format_guest_list(guests):
+    """Formats a list of guests into a natural greeting"""
+    if len(guests) == 1:
+        return guests[0]
+    elif len(guests) == 2:
+        return f"{guests[0]} and {guests[1]}"
+    else:
+        return f"{', '.join(guests[:-1])}, and {guests[-1]}"
+
+def generate_calendar_links(event_title, start_datetime, end_datetime, location, description, ics_link,
+                            extra_params=None):
+    """
+    Generate Google Calendar and Apple/Outlook Calendar links.
+
+    Args:
+        event_title (str): The title of the event.
+        start_datetime (str): Start datetime in the format "YYYYMMDDTHHMMSSZ".
+        end_datetime (str): End datetime in the format "YYYYMMDDTHHMMSSZ".
+        location (str): The event's location.
+        description (str): Event description.
+        ics_link (str): Link to the event's .ics download, for Apple/Outlook.
+        extra_params (dict): Additional Google Calendar parameters.
+
+    Returns:
+        tuple: Google Calendar link, Apple/Outlook .ics content link.
+    """
+    # Google Calendar link
+    google_params = {
+        'action': 'TEMPLATE',
+        'text': event_title,
+        'dates': f"{start_datetime}/{end_datetime}",
+        'details': description,
+        'location': location,
+        **(extra_params or {})
+    }
+    return GOOGLE_CALENDAR_URL + urlencode(google_params), ics_link
+
+
+class CampaignSpec:
+    """A campaign definition, loaded from JSON (see the module docstring for the fields)"""
+
+    def __init__(self, name, template, subject, audience, template_values=None, image=None,
+                 invites=None, calendar=None, rate_limits=None, concurrency=1, bulk_create=False,
+                 bulk_chunk_size=100, output_prefix=None, log_file=None):
+        self.name = name
+        self.subject = subject
+        self.audience = audience
+        self.image = image or {}
+        self.invites = invites
+        self.calendar = calendar
+        self.rate_limits = rate_limits or {}
+        self.concurrency = concurrency
+        self.bulk_create = bulk_create
+        self.bulk_chunk_size = bulk_chunk_size
+        self.output_prefix = output_prefix or f'sent_{name}'
+        self.log_file = log_file or f'{OUTPUT_DIR}/log/{name}.log'
+
+        # Compiled once; only the per-guest values are substituted for each row
+        self.template = EmailTemplate.from_file(template).partial(**(template_values or {}))
+        unknown = self.template.placeholders - ROW_PLACEHOLDERS
+        if unknown:
+            raise ValueError(f"Campaign {name}: template placeholders without a value: {', '.join(sorted(unknown))}")
+        if set(audience) not in ({'csv'}, {'mongo'}):
+            raise ValueError(f"Campaign {name}: audience must have exactly one of 'csv' or 'mongo'")
+        unknown = set(self.rate_limits) - RATE_LIMIT_FIELDS
+        if unknown:
+            raise ValueError(f"Campaign {name}: unknown rate_limits: {', '.join(sorted(unknown))}")
+        if calendar and calendar.get('event') not in EVENTS:
+            raise ValueError(f"Campaign {name}: calendar event must be one of {', '.join(EVENTS)}")
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads a spec from a path, or by name from ./campaigns"""
+        path = Path(path)
+        if not path.exists() and not path.is_absolute():
+            path = CAMPAIGN_DIR / (path.name if path.suffix else f'{path.name}.json')
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+        unknown = set(spec) - SPEC_FIELDS
+        if unknown:
+            raise ValueError(f"{path}: unknown campaign fields: {', '.join(sorted(unknown))}")
+        spec.setdefault('name', path.stem)
+        return cls(**spec)
+
+    @property
+    def creates_invites(self):
+        return bool(self.invites)
+
+    @property
+    def location(self):
+        return (self.invites or {}).get('location', 'Canada')
+
+    def calendar_links(self, invite_id=None):
+        """(google_link, apple_outlook_link) for a guest, or ('', '') without a calendar"""
+        if not self.calendar:
+            return '', ''
+        event = EVENTS[self.calendar['event']]
+        start, end = event_times_utc(self.calendar['event'])
+        values = {'invite_id': invite_id or '', 'invite_link': generate_invite_link(invite_id) if invite_id else ''}
+        values['ics_link'] = self.calendar.get('ics_link', '').format(**values)
+        return generate_calendar_links(
+            event_title=self.calendar.get('title', event['title']),
+            start_datetime=start,
+            end_datetime=end,
+            location=self.calendar.get('location', event['location']),
+            description=self.calendar.get('description', event['description']).format(**values),
+            ics_link=values['ics_link'],
+            extra_params=self.calendar.get('google_params')
+        )
+
+    def render_email(self, guests, invite_id=None):
+        """Renders the email body for a household"""
+        google_link, apple_outlook_link = self.calendar_links(invite_id)
+        return self.template.render(
+            greeting=format_guest_list(guests),
+            invite_link=generate_invite_link(invite_id) if invite_id else '',
+            google_link=google_link,
+            apple_outlook_link=apple_outlook_link
+        )
+
+
+def load_sent_emails(path):
+    """{invite_id: emails} from an earlier campaign's journal (.jsonl) or results CSV"""
+    if str(path).endswith('.jsonl'):
+        with SendJournal(path) as journal:
+            results = pd.DataFrame(journal.results())
+    else:
+        results = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if results.empty:
+        return {}
+    results = results[results['invite_id'].astype(bool) & results['emails'].astype(bool)]
+    return dict(zip(results['invite_id'], results['emails']))
+
+def load_mongo_audience(collection, query, emails_from=None):
+    """
+    Audience rows (Guests, email, plus one, invite_id) for the invites matching
+    query. Addresses come from an 'emails' field on the invite if present,
+    otherwise from emails_from (see load_sent_emails).
+    """
+    sent_emails = load_sent_emails(emails_from) if emails_from else {}
+    projection = {'guests.firstName': 1, 'guests.lastName': 1, 'givenPlusOne': 1, 'emails': 1}
+    rows = []
+    for invite in collection.find(query, projection):
+        invite_id = str(invite['_id'])
+        emails = invite.get('emails')
+        if isinstance(emails, list):
+            emails = ', '.join(emails)
+        rows.append({
+            'Guests': ', '.join(
+                f"{guest.get('firstName', '')} {guest.get('lastName') or ''}".strip()
+                for guest in invite.get('guests', [])
+            ),
+            'email': emails or sent_emails.get(invite_id, ''),
+            'plus one': 'yes' if invite.get('givenPlusOne') else 'no',
+            'invite_id': invite_id,
+        })
+    return pd.DataFrame(rows, columns=['Guests', 'email', 'plus one', 'invite_id'])
+
+def load_audience(spec):
+    """The campaign's audience as a DataFrame of invite rows"""
+    if 'csv' in spec.audience:
+        return load_invite_csv(spec.audience['csv'])
+    from mongo_connection import get_collection
+    mongo = spec.audience['mongo']
+    query = json_util.loads(json.dumps(mongo.get('query', {})))  # {"$oid": ...} / {"$date": ...} allowed
+    return load_mongo_audience(get_collection(mongo.get('collection', 'invites')), query, mongo.get('emails_from'))
+
+
+def parse_invite_row(row):
+    """Returns (guests, emails, has_plus_one) for a single CSV row"""
+    guests = [g.strip() for g in row['Guests'].split(',')]
+    emails_list = [e.strip() for e in row['email'].split(',')]
+    has_plus_one = pd.notna(row['plus one']) and row['plus one'].lower() == 'yes'
+    return guests, emails_list, has_plus_one
+
+def journal_keys(dataframe):
+    """{row index: household_key} for every parseable row"""
+    keys = {}
+    for idx, row in dataframe.iterrows():
+        try:
+            keys[idx] = household_key(parse_invite_row(row)[0])
+        except Exception:
+            continue
+    return keys
+
+def row_invite_id(row):
+    """Invite ID carried by the audience row itself (MongoDB audiences), or None"""
+    invite_id = row.get('invite_id')
+    return invite_id if isinstance(invite_id, str) and invite_id else None
+
+
+class Campaign:
+    """Sends one campaign's emails (and creates its invites) for a queue of audience rows"""
+
+    def __init__(self, spec, email_manager, invite_manager=None, journal=None, image_path=None):
+        if spec.creates_invites and invite_manager is None:
+            raise ValueError(f"Campaign {spec.name} creates invites and needs an invite_manager")
+        self.spec = spec
+        self.email_manager = email_manager
+        self.invite_manager = invite_manager
+        self.journal = journal
+        self.image_path = image_path if image_path is not None else spec.image.get('path')
+
+    def create_invites_in_bulk(self, dataframe, chunk_size=100):
+        """
+        Creates the invites for every parseable row through the bulk API.
+
+        Returns {row index: invite ID}; rows whose chunk failed map to the exception
+        instead, and rows that could not be parsed are left out (process_row
+        reports their parse error as usual). With a journal, each chunk's invites
+        are recorded as soon as they are created.
+        """
+        # Names for every row are parsed in one vectorized pass (ingest_invites has already done it)
+        guest_data = dataframe['guest_data'] if 'guest_data' in dataframe else parse_households(dataframe['Guests'])
+
+        indexes, households = [], []
+        for idx, row in dataframe.iterrows():
+            try:
+                guests, _, has_plus_one = parse_invite_row(row)
+            except Exception:
+                continue
+            indexes.append(idx)
+            households.append({'guests': guests, 'given_plus_one': has_plus_one,
+                               'location': self.spec.location, 'guest_data': guest_data[idx]})
+
+        def record_chunk(offset, ids):
+            for household, invite_id in zip(households[offset:offset + len(ids)], ids):
+                self.journal.record(
+                    household_key(household['guests']), 'invite_created',
+                    invite_id=invite_id,
+                    invite_link=generate_invite_link(invite_id),
+                    guests=', '.join(household['guests'])
+                )
+
+        try:
+            invite_ids = self.invite_manager.create_invites_bulk(
+                households, chunk_size=chunk_size, on_created=record_chunk if self.journal else None
+            )
+        except BulkInviteError as e:
+            invite_ids = e.invite_ids + [e] * (len(households) - len(e.invite_ids))
+
+        return dict(zip(indexes, invite_ids))
+
+    def process_row(self, idx, row, invite_limiter=None, email_limiter=None, invite_id=None):
+        """
+        Creates the invite for a single audience row (if the campaign creates
+        invites), emails it and returns the result record. Pass invite_id when
+        the invite was already created (e.g. by create_invites_in_bulk). With a
+        journal, every step is recorded and an invite from an earlier run is reused.
+        The result's 'deferred' flag marks emails that failed transiently and can be retried.
+        Raises QuotaExceeded once the SMTP sending quota is used up, before any
+        invite is created for the row.
+        """
+        invite_limiter = invite_limiter or RateLimiter()
+        email_limiter = email_limiter or AdaptiveRateLimiter()
+        journal = self.journal
+
+        try:
+            # Parse guests and emails
+            guests, emails_list, has_plus_one = parse_invite_row(row)
+
+            logging.info(f"Processing {self.spec.name} for guests: {guests}")
+            key = household_key(guests)
+
+            # Create invite through API, unless it was created in bulk beforehand or by an earlier run
+            if isinstance(invite_id, Exception):
+                raise invite_id
+            if invite_id is None:
+                invite_id = row_invite_id(row)
+            if invite_id is None and journal:
+                invite_id = journal.invite_id(key)
+
+            # The email token is taken first, so no invite is created once the quota is used up
+            email_limiter.acquire()
+            if invite_id is None and self.spec.creates_invites:
+                invite_limiter.acquire()
+                invite_id = self.invite_manager.create_invite(
+                    guests=guests,
+                    given_plus_one=has_plus_one,
+                    location=self.spec.location
+                )
+            invite_link = generate_invite_link(invite_id) if invite_id else None
+            if journal and invite_id and journal.invite_id(key) != invite_id:
+                journal.record(key, 'invite_created', invite_id=invite_id, invite_link=invite_link,
+                               guests=', '.join(guests))
+
+            # Render the precompiled HTML email
+            email_content = self.spec.render_email(guests, invite_id)
+
+            # Send the email
+            if journal:
+                journal.record(key, 'email_queued', guests=', '.join(guests), emails=', '.join(emails_list))
+            outcome, error = self.email_manager.deliver(
+                to_addresses=emails_list,
+                subject=self.spec.subject,
+                html_content=email_content,
+                image_path=self.image_path
+            )
+            # Slow down (or stop) on rate-limit replies, speed back up on successes
+            email_limiter.record(outcome)
+            email_sent = outcome == SENT
+            if journal:
+                journal.record(key, 'email_sent', email_sent=email_sent, error=error)
+
+            # Record the result
+            return {
+                'guests': ', '.join(guests),
+                'emails': ', '.join(emails_list),
+                'invite_id': invite_id,
+                'invite_link': invite_link,
+                'email_sent': email_sent,
+                'deferred': outcome in RETRYABLE,
+                'error': error,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        except QuotaExceeded:
+            raise
+        except Exception as e:
+            logging.error(f"Error processing row {idx}: {str(e)}")
+            if journal and 'key' in locals():
+                journal.record(key, 'failed', error=str(e), guests=', '.join(guests), emails=', '.join(emails_list))
+            # An invite created before the failure (or by a previous attempt) is kept
+            invite_id = invite_id if isinstance(invite_id, str) else None
+            return {
+                'guests': ', '.join(guests) if 'guests' in locals() else 'Unknown',
+                'emails': ', '.join(emails_list) if 'emails_list' in locals() else 'Unknown',
+                'invite_id': invite_id,
+                'invite_link': generate_invite_link(invite_id) if invite_id else None,
+                'email_sent': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def send(self, dataframe, concurrency=1, invite_rate=None, email_rate=None, email_max_rate=None,
+             max_email_attempts=4, bulk_create=False, bulk_chunk_size=100):
+        """
+        Process the audience and send emails.
+
+        With concurrency > 1 rows are handled by a bounded thread pool, so invite
+        creation for one row overlaps with SMTP delivery for others. invite_rate
+        caps invite creation in operations per second across all workers. email_rate
+        is the starting email rate: it is cut back whenever the SMTP server replies
+        with a rate limit and raised again (up to email_max_rate) as sends succeed.
+        Emails that fail transiently are retried after a delay, up to
+        max_email_attempts attempts in total.
+        With bulk_create every invite is created up front in chunks of
+        bulk_chunk_size, and the workers only send emails.
+        With a journal (see send_journal), households already emailed by an earlier
+        run are skipped and invites already created are reused rather than recreated.
+        Results are always returned in the same order as the dataframe rows.
+        Once the SMTP sending quota is used up, rows not yet started are cancelled
+        and QuotaExceeded is raised; the journal holds everything done so far.
+        """
+        invite_limiter = RateLimiter(invite_rate)
+        email_limiter = AdaptiveRateLimiter(email_rate, max_rate=email_max_rate)
+        journal = self.journal
+
+        keys = journal_keys(dataframe) if journal else {}
+        done = {idx: journal.result(key) for idx, key in keys.items() if journal.is_sent(key)}
+        if done:
+            logging.info(f"Resuming: skipping {len(done)} households already emailed")
+        for idx, key in keys.items():
+            if journal.state(key) == 'email_queued':
+                logging.warning(f"Row {idx} was interrupted mid-send last run; resending, it may arrive twice")
+
+        invite_ids = {}
+        if bulk_create and self.spec.creates_invites:
+            # Only households without an invite from an earlier run
+            created = [idx for idx, key in keys.items() if journal.invite_id(key)]
+            pending = dataframe.drop(index=created)
+            invite_ids = self.create_invites_in_bulk(pending, bulk_chunk_size)
+
+        def process(idx, row):
+            if idx in done:
+                return done[idx]
+            return self.process_row(
+                idx, row,
+                invite_limiter=invite_limiter,
+                email_limiter=email_limiter,
+                invite_id=invite_ids.get(idx)
+            )
+
+        def run(rows):
+            """{row index: result} for a list of (idx, row) pairs"""
+            if concurrency <= 1:
+                return {idx: process(idx, row) for idx, row in rows}
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {idx: executor.submit(process, idx, row) for idx, row in rows}
+                try:
+                    return {idx: future.result() for idx, future in futures.items()}
+                except QuotaExceeded:
+                    # Rows already being sent finish; the rest are never started
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        if concurrency > 1:
+            logging.info(f"Processing {self.spec.name} with {concurrency} concurrent workers")
+        results = run(list(dataframe.iterrows()))
+
+        # Deferred emails wait in a delayed-retry queue; each retry reuses the row's invite
+        retries = RetryQueue()
+        attempts = {}
+
+        def defer(idx):
+            attempts[idx] = attempts.get(idx, 1) + 1
+            if attempts[idx] <= max_email_attempts:
+                delay = min(email_limiter.max_cooldown, email_limiter.base_cooldown * 2 ** (attempts[idx] - 1))
+                retries.push(idx, delay)
+
+        for idx, result in results.items():
+            if result.get('deferred'):
+                defer(idx)
+        for due in retries.drain():
+            logging.info(f"Retrying {len(due)} deferred emails")
+            self.email_manager.metrics.record_retries(len(due))
+            for idx in due:
+                invite_ids[idx] = results[idx]['invite_id']
+            for idx, result in run([(idx, dataframe.loc[idx]) for idx in due]).items():
+                results[idx] = result
+                if result.get('deferred'):
+                    defer(idx)
+
+        return [results[idx] for idx in dataframe.index]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run an email campaign from a JSON spec')
+    parser.add_argument('spec', help='Campaign spec: a path, or a name in ./campaigns (e.g. invites_canada)')
+    parser.add_argument('--concurrency', '-c', type=int, default=None,
+                        help="Number of rows processed concurrently (default: the spec's, else 1)")
+    parser.add_argument('--invite-rate', type=float, default=None,
+                        help='Max invites created per second across all workers (default: unlimited)')
+    parser.add_argument('--email-rate', type=float, default=None,
+                        help='Starting email rate per second across all workers, adapted to SMTP rate '
+                             'limiting (default: unlimited until the server pushes back)')
+    parser.add_argument('--email-max-rate', type=float, default=None,
+                        help='Never raise the adapted email rate above this (default: no cap)')
+    parser.add_argument('--max-email-attempts', type=int, default=None,
+                        help='Attempts per email before a transient failure is final (default: 4)')
+    parser.add_argument('--bulk-create', action='store_true', default=None,
+                        help='Create all invites up front through the bulk API before sending emails')
+    parser.add_argument('--bulk-chunk-size', type=int, default=None,
+                        help='Invites per bulk API request (default: 100, max: 200)')
+    parser.add_argument('--preflight-only', action='store_true',
+                        help='Validate the audience and report rejected rows without creating or sending anything')
+    parser.add_argument('--skip-invited-check', action='store_true',
+                        help="Don't check MongoDB for guests who already have an invite")
+    parser.add_argument('--journal', default=None,
+                        help=f'Send journal used to resume an interrupted run '
+                             f'(default: {OUTPUT_DIR}/journal/<campaign>.jsonl)')
+    return parser.parse_args(argv)
+
+def setting(cli_value, spec_value, default):
+    """A CLI flag overrides the spec, which overrides the built-in default"""
+    if cli_value is not None:
+        return cli_value
+    return spec_value if spec_value is not None else default
+
+def invites_collection(skip_check):
+    """The invites collection for the already-invited check, or None when it is skipped or not configured"""
+    if skip_check:
+        return None
+    from mongo_connection import get_collection
+    try:
+        return get_collection('invites')
+    except RuntimeError as e:
+        logging.warning(f"Skipping the already-invited check: {e}")
+        return None
+
+def preflight(spec, skip_invited_check=False, known_invite_ids=()):
+    """
+    Loads and validates the audience before anything is sent. Rejected rows are
+    logged and saved next to the results; returns the ingest result with the
+    clean work queue. Only campaigns that create invites check for guests who
+    already have one; invites in known_invite_ids (this campaign's journal) don't count.
+    """
+    data = load_audience(spec)
+    logging.info(f"Successfully loaded {len(data)} audience rows")
+
+    collection = invites_collection(skip_invited_check) if spec.creates_invites else None
+    ingest = ingest_invites(data, collection, location=spec.location, known_invite_ids=known_invite_ids)
+    logging.info(f"Pre-flight: {ingest.summary()}")
+    if not ingest.rejected.empty:
+        rejected_path = f'{OUTPUT_DIR}/rejected_{spec.name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        ingest.rejected.to_csv(rejected_path)
+        logging.info(f"Rejected rows saved to {rejected_path}")
+    return ingest
+
+def configure_logging(log_file):
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = CampaignSpec.from_file(args.spec)
+    configure_logging(spec.log_file)
+
+    # Load .env file from the current directory
+    if not load_dotenv():
+        raise ValueError("No .env file found in the current directory")
+
+    rate_limits = spec.rate_limits
+    concurrency = setting(args.concurrency, spec.concurrency, 1)
+    journal_path = args.journal or f'{OUTPUT_DIR}/journal/{spec.name}.jsonl'
+
+    # Load the audience and drop rows that would fail before opening any connection
+    journal = SendJournal(journal_path)
+    try:
+        ingest = preflight(spec, args.skip_invited_check, journal.invite_ids())
+    except Exception:
+        journal.close()
+        raise
+    print(ingest.summary())
+    if args.preflight_only or ingest.queue.empty:
+        journal.close()
+        return
+
+    # Load environment variables
+    email_address = os.getenv('WEDDING_EMAIL')
+    email_password = os.getenv('WEDDING_EMAIL_PASSWORD')
+
+    if not email_address or not email_password:
+        journal.close()
+        raise ValueError("Email credentials not found in environment variables")
+
+    # Initialize managers
+    # One pooled SMTP session per worker, so concurrent sends never queue on a connection
+    email_manager = EmailManager(email_address, email_password, pool_size=max(1, concurrency),
+                                 image_content_id=spec.image.get('content_id', 'wedding_photo'))
+    invite_manager = WeddingInviteManager(pool_size=max(1, concurrency)) if spec.creates_invites else None
+    campaign = Campaign(spec, email_manager, invite_manager, journal)
+
+    try:
+        # Process invites and send emails
+        quota_exceeded = False
+        try:
+            campaign.send(
+                ingest.queue,
+                concurrency=concurrency,
+                invite_rate=setting(args.invite_rate, rate_limits.get('invite_rate'), None),
+                email_rate=setting(args.email_rate, rate_limits.get('email_rate'), None),
+                email_max_rate=setting(args.email_max_rate, rate_limits.get('email_max_rate'), None),
+                max_email_attempts=setting(args.max_email_attempts, rate_limits.get('max_email_attempts'), 4),
+                bulk_create=setting(args.bulk_create, spec.bulk_create, False),
+                bulk_chunk_size=setting(args.bulk_chunk_size, spec.bulk_chunk_size, 100)
+            )
+        except QuotaExceeded as e:
+            # Stop here but still report what was done; the rest goes out on a later run
+            quota_exceeded = True
+            logging.warning(f"{e}; progress is saved in {journal_path}")
+
+        # Save results to CSV, from the journal so households finished by earlier runs are included;
+        # the audience's households come first, in row order whatever order the workers finished in
+        results = journal.results(journal_keys(ingest.queue).values())
+        results_df = pd.DataFrame(results)
+        output_path = f'{OUTPUT_DIR}/{spec.output_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        results_df.to_csv(output_path, index=False)
+        logging.info(f"Results saved to {output_path}")
+
+        # Print summary
+        successful_sends = sum(1 for r in results if r['email_sent'])
+        print(f"\nSummary:")
+        print(f"Total households processed: {len(results)}")
+        print(f"Successful email sends: {successful_sends}")
+        print(f"Failed email sends: {len(results) - successful_sends}")
+        metrics = email_manager.metrics.summary()
+        print(f"This run: {metrics['sent']} sent ({metrics['sent_per_sec']}/s), "
+              f"{metrics['deferred']} deferred ({metrics['throttled']} rate limited), "
+              f"{metrics['retried']} retries, {metrics['permanent_failures']} permanent failures")
+        print(f"Results saved to: {output_path}")
+        if quota_exceeded:
+            print(f"Stopped early: the sending quota is used up. Rerun later to resume from {journal_path}")
+
+    except Exception as e:
+        logging.error(f"Critical error in main execution: {str(e)}")
+        logging.error(f"Progress is saved in {journal_path}; rerun to resume")
+        raise
+    finally:
+        journal.close()
+        email_manager.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Minimal Cloudinary Admin API client for deleting uploaded wedding media.
+
+Only the call the photo purge needs is implemented: bulk deletion of up to 100
+assets per request (DELETE /resources/<resource_type>/<type>). Credentials come
+from CLOUDINARY_URL (cloudinary://<api_key>:<api_secret>@<cloud_name>) or the
+CLOUDINARY_CLOUD_NAME / CLOUDINARY_API_KEY / CLOUDINARY_API_SECRET variables in
+.env.
+
+StubCloudinaryClient has the same interface and records deletions in memory,
+for dry runs and local testing without touching the real account.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE = "https://api.cloudinary.com/v1_1"
+MAX_IDS_PER_DELETE = 100  # Admin API limit per delete_resources call
+
+# Path segments between /upload/ and the public id that are transformations, e.g. q_auto or w_400,h_300
+TRANSFORMATION_SEGMENT = re.compile(r"^[a-z]{1,3}_[^/]*$")
+VERSION_SEGMENT = re.compile(r"^v\d+$")
+
+
+def parse_asset_url(url: str) -> Optional[Tuple[str, str, str]]:
+    """
+    (resource_type, delivery_type, public_id) for a Cloudinary delivery URL such as
+    https://res.cloudinary.com/<cloud>/image/upload/q_auto/v1712/wedding/abc.jpg,
+    or None if the URL is not a Cloudinary asset.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if not parsed.netloc.endswith("cloudinary.com"):
+        return None
+    segments = [unquote(segment) for segment in parsed.path.split("/") if segment]
+    # <cloud>/<resource_type>/<delivery_type>/[transformations/][v<version>/]<public_id>
+    if len(segments) < 4:
+        return None
+    resource_type, delivery_type, rest = segments[1], segments[2], segments[3:]
+    versions = [i for i, segment in enumerate(rest[:-1]) if VERSION_SEGMENT.match(segment)]
+    if versions:
+        # Everything before the version is transformations
+        rest = rest[versions[0] + 1:]
+    else:
+        while len(rest) > 1 and ("," in rest[0] or TRANSFORMATION_SEGMENT.match(rest[0])):
+            rest = rest[1:]
+    public_id = "/".join(rest)
+    if resource_type != "raw":
+        public_id = os.path.splitext(public_id)[0]  # images and videos are addressed without extension
+    return resource_type, delivery_type, public_id
+
+
+class CloudinaryClient:
+    """Admin API client; thread-safe, sharing one pooled keep-alive session."""
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, pool_size: int = 4):
+        self.cloud_name = cloud_name
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["DELETE"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.auth = (api_key, api_secret)
+
+    @classmethod
+    def from_env(cls, pool_size: int = 4) -> Optional["CloudinaryClient"]:
+        """Client from CLOUDINARY_URL or the CLOUDINARY_* variables, or None if they are not set."""
+        url = os.getenv("CLOUDINARY_URL")
+        if url and url.startswith("cloudinary://"):
+            parsed = urlparse(url)
+            if parsed.username and parsed.password and parsed.hostname:
+                return cls(parsed.hostname, unquote(parsed.username), unquote(parsed.password), pool_size)
+        cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
+        api_key = os.getenv("CLOUDINARY_API_KEY")
+        api_secret = os.getenv("CLOUDINARY_API_SECRET")
+        if cloud_name and api_key and api_secret:
+            return cls(cloud_name, api_key, api_secret, pool_size)
+        return None
+
+    def delete_resources(self, public_ids: Iterable[str], resource_type: str = "image",
+                         delivery_type: str = "upload") -> Dict[str, str]:
+        """
+        Delete up to MAX_IDS_PER_DELETE assets in one call.
+        Returns {public_id: "deleted" | "not_found" | ...} as reported by Cloudinary.
+        """
+        public_ids = list(public_ids)
+        if len(public_ids) > MAX_IDS_PER_DELETE:
+            raise ValueError(f"At most {MAX_IDS_PER_DELETE} public ids per delete, got {len(public_ids)}")
+        response = self.session.delete(
+            f"{API_BASE}/{self.cloud_name}/resources/{resource_type}/{delivery_type}",
+            params=[("public_ids[]", public_id) for public_id in public_ids],
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.json().get("deleted", {})
+
+    def close(self):
+        self.session.close()
+
+
+class StubCloudinaryClient:
+    """
+    In-memory stand-in for CloudinaryClient. Every id is reported "deleted" the
+    first time and "not_found" after that; `latency` simulates the API round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.deleted = set()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def delete_resources(self, public_ids: Iterable[str], resource_type: str = "image",
+                         delivery_type: str = "upload") -> Dict[str, str]:
+        public_ids = list(public_ids)
+        if len(public_ids) > MAX_IDS_PER_DELETE:
+            raise ValueError(f"At most {MAX_IDS_PER_DELETE} public ids per delete, got {len(public_ids)}")
+        if self.latency:
+            time.sleep(self.latency)
+        results = {}
+        with self._lock:
+            self.calls += 1
+            for public_id in public_ids:
+                key = (resource_type, delivery_type, public_id)
+                results[public_id] = "not_found" if key in self.deleted else "deleted"
+                self.deleted.add(key)
+        return results
+
+    def close(self):
+        pass
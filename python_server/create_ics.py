@@ -1,64 +1,403 @@
+"""
+Generate ICS calendar files for the wedding events.
+
+Single file (default):
+  python create_ics.py
+    Writes wedding_invite.ics for the Canada reception
+
+Batch mode:
+  python create_ics.py --batch [--out-dir out_ics] [--zip out_ics/calendars.zip]
+    Writes a personalised calendar for every invite in the database, with the
+    events that invite is invited to (Canada, Australia or both). Each event has
+    a stable per-invite UID, so re-importing an updated file replaces the event
+    instead of duplicating it. The VEVENT bodies are escaped and folded once per
+    event; only the per-invite lines are rendered for each invite.
+
+Event times are stored as venue-local wall-clock times and written with TZID
+parameters plus matching VTIMEZONE blocks generated from zoneinfo, so they
+stay correct across DST. CalendarCache keeps rendered calendars in an LRU
+keyed on (invite id, event set, sequence), for serving repeated downloads
+without re-rendering; invalidate() drops an invite when its RSVP changes.
+"""
+
 import os
-from datetime import datetime
+import uuid
+import zipfile
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from mongo_connection import get_collection
+
+PRODID = "-//NickAndTashWedding//NONSGML v1.0//EN"
+INVITE_BASE_URL = "https://nick-and-tash-wedding.web.app/invite"
+UID_DOMAIN = "nick-and-tash-wedding"
+CRLF = "\r\n"
+
+# Event times are venue-local wall-clock times in the event's tzid
+EVENTS = {
+    'canada': {
+        'title': "Nicholas & Natasha's Wedding",
+        'start': datetime(2025, 8, 23, 17, 0),  # 5 PM EDT
+        'end': datetime(2025, 8, 24, 0, 0),     # 12 AM EDT
+        'tzid': "America/Toronto",
+        'location': "Sheraton Parkway Toronto North Hotel & Suites, 600 Hwy 7, Richmond Hill, ON L4B 1B2",
+        'description': "Join us to celebrate Nicholas and Natasha's Wedding Reception!",
+    },
+    'australia': {
+        'title': "Nicholas & Natasha's 🇦🇺 Wedding",
+        'start': datetime(2025, 10, 11, 15, 0),  # 3 PM AEST
+        'end': datetime(2025, 10, 11, 23, 0),    # 11 PM AEST
+        'tzid': "Australia/Brisbane",  # Maleny, QLD - AEST all year, no DST
+        'location': "Tiffany's Maleny, 409 Mountain View Road, Maleny QLD 4552",
+        'description': "Join us to celebrate Nicholas and Natasha's Wedding!",
+    },
+}
+
+# invitedLocation → events on that invite's calendar
+LOCATION_EVENTS = {
+    'Canada': ['canada'],
+    'Australia': ['australia'],
+    'Both Australia and Canada': ['canada', 'australia'],
+}
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)."""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+def fold_line(line):
+    """
+    Fold a content line into 75-octet chunks (RFC 5545 section 3.1), never
+    splitting a multi-byte UTF-8 character. Returns the line with its CRLF.
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + CRLF
+
+    chunks = []
+    start, limit = 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # back up to the start of a UTF-8 sequence
+        chunks.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74  # continuation lines start with a space
+    return (CRLF + ' ').join(chunks) + CRLF
+
+def utc_stamp(moment=None):
+    return (moment or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+
+def local_stamp(moment):
+    return moment.strftime("%Y%m%dT%H%M%S")
 
-def generate_ics(event_title, start_datetime, end_datetime, location, description):
+def to_utc(local_time, tzid):
+    """Convert a venue-local wall-clock time to an aware UTC datetime."""
+    return local_time.replace(tzinfo=ZoneInfo(tzid)).astimezone(timezone.utc)
+
+def event_times_utc(key):
+    """(start, end) of an event as UTC "YYYYMMDDTHHMMSSZ" strings, e.g. for Google Calendar links."""
+    event = EVENTS[key]
+    return utc_stamp(to_utc(event['start'], event['tzid'])), utc_stamp(to_utc(event['end'], event['tzid']))
+
+def format_offset(offset):
+    minutes = int(offset.total_seconds() // 60)
+    sign = '+' if minutes >= 0 else '-'
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours:02d}{minutes:02d}"
+
+@lru_cache(maxsize=None)
+def vtimezone(tzid, year):
+    """
+    Build a VTIMEZONE block for `tzid` from the zoneinfo database, with one
+    STANDARD/DAYLIGHT component per UTC offset transition in `year`.
+    """
+    zone = ZoneInfo(tzid)
+
+    def offset_at(moment):
+        return moment.astimezone(zone).utcoffset()
+
+    transitions = []
+    day = datetime(year, 1, 1, tzinfo=timezone.utc)
+    end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    previous = offset_at(day)
+    while day < end:
+        next_day = day + timedelta(days=1)
+        if offset_at(next_day) != previous:
+            # Bisect to the minute the offset changes
+            low, high = day, next_day
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if offset_at(middle) == previous:
+                    low = middle
+                else:
+                    high = middle
+            moment = high.replace(second=0, microsecond=0)
+            transitions.append((moment, previous, offset_at(moment)))
+            previous = offset_at(moment)
+        day = next_day
+
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tzid}"]
+    if not transitions:
+        moment = datetime(year, 1, 1, tzinfo=timezone.utc).astimezone(zone)
+        lines += [
+            "BEGIN:STANDARD",
+            "DTSTART:19700101T000000",
+            f"TZOFFSETFROM:{format_offset(moment.utcoffset())}",
+            f"TZOFFSETTO:{format_offset(moment.utcoffset())}",
+            f"TZNAME:{moment.tzname()}",
+            "END:STANDARD",
+        ]
+    for moment, offset_from, offset_to in transitions:
+        local = moment.astimezone(zone)
+        kind = "DAYLIGHT" if local.dst() else "STANDARD"
+        lines += [
+            f"BEGIN:{kind}",
+            # DTSTART is the wall-clock time the transition happens, in the old offset
+            f"DTSTART:{local_stamp((moment + offset_from).replace(tzinfo=None))}",
+            f"TZOFFSETFROM:{format_offset(offset_from)}",
+            f"TZOFFSETTO:{format_offset(offset_to)}",
+            f"TZNAME:{local.tzname()}",
+            f"END:{kind}",
+        ]
+    lines.append("END:VTIMEZONE")
+    return ''.join(fold_line(line) for line in lines)
+
+def generate_ics(event_title, start_datetime, end_datetime, location, description, uid=None,
+                 tzid=EVENTS['canada']['tzid']):
     """
     Generate the ICS content for an event.
 
     Args:
         event_title (str): The title of the event.
-        start_datetime (str): Start datetime in the format "YYYY-MM-DD HH:MM:SS".
-        end_datetime (str): End datetime in the format "YYYY-MM-DD HH:MM:SS".
+        start_datetime (str): Venue-local start in the format "YYYY-MM-DD HH:MM:SS".
+        end_datetime (str): Venue-local end in the format "YYYY-MM-DD HH:MM:SS".
         location (str): The event's location.
         description (str): Event description.
+        uid (str): Optional UID; defaults to a random UUID so files generated in
+            the same second never collide.
+        tzid (str): The venue's time zone; written as TZID with its VTIMEZONE.
 
     Returns:
         str: The ICS content.
     """
-    # Convert start and end datetime to the correct format
+    # Wall-clock times at the venue, written with their TZID rather than as UTC
     start_time = datetime.strptime(start_datetime, "%Y-%m-%d %H:%M:%S")
     end_time = datetime.strptime(end_datetime, "%Y-%m-%d %H:%M:%S")
+    dtstamp = utc_stamp()
 
-    # Format datetime in UTC
-    start_datetime_utc = start_time.strftime("%Y%m%dT%H%M%SZ")
-    end_datetime_utc = end_time.strftime("%Y%m%dT%H%M%SZ")
-    dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    uid = uid or f"{uuid.uuid4()}@{UID_DOMAIN}"
 
-    # Generate UID based on the timestamp (this should be globally unique)
-    uid = f"{dtstamp}-nick-and-tash-wedding"
+    header = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+    ]
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART;TZID={tzid}:{local_stamp(start_time)}",
+        f"DTEND;TZID={tzid}:{local_stamp(end_time)}",
+        f"SUMMARY:{escape_text(event_title)}",
+        f"DESCRIPTION:{escape_text(description)}",
+        f"LOCATION:{escape_text(location)}",
+        "STATUS:CONFIRMED",
+        "SEQUENCE:0",
+        "TRANSP:OPAQUE",
+        "BEGIN:VALARM",
+        "TRIGGER:-P2DT0H0M",
+        f"DESCRIPTION:{escape_text(f'Reminder: {event_title}')}",
+        "ACTION:DISPLAY",
+        "END:VALARM",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    return (''.join(fold_line(line) for line in header)
+            + vtimezone(tzid, start_time.year)
+            + ''.join(fold_line(line) for line in lines))
 
-    # Start the ICS content
-    ics_content = """BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//NickAndTashWedding//NONSGML v1.0//EN
-CALSCALE:GREGORIAN
-"""
+class EventTemplate:
+    """
+    A VEVENT whose static properties are escaped and folded once. Rendering
+    only fills in the per-invite lines (UID, DTSTAMP, SEQUENCE, DESCRIPTION, URL).
+    """
 
-    # Event details
-    ics_content += f"""BEGIN:VEVENT
-UID:{uid}
-DTSTAMP:{dtstamp}
-DTSTART:{start_datetime_utc}
-DTEND:{end_datetime_utc}
-SUMMARY:{event_title}
-DESCRIPTION:{description}
-LOCATION:{location}
-STATUS:CONFIRMED
-SEQUENCE:0
-TRANSP:OPAQUE
-BEGIN:VALARM
-TRIGGER:-P2DT0H0M
-DESCRIPTION:Reminder: {event_title}
-ACTION:DISPLAY
-END:VALARM
-END:VEVENT
-"""
+    def __init__(self, key, title, start, end, tzid, location, description, alarm_minutes=120):
+        self.key = key
+        self.tzid = tzid
+        self.year = start.year
+        self.description = description
+        self._static = ''.join(fold_line(line) for line in [
+            f"DTSTART;TZID={tzid}:{local_stamp(start)}",
+            f"DTEND;TZID={tzid}:{local_stamp(end)}",
+            f"SUMMARY:{escape_text(title)}",
+            f"LOCATION:{escape_text(location)}",
+            "STATUS:CONFIRMED",
+            "TRANSP:OPAQUE",
+        ])
+        self._alarm = ''.join(fold_line(line) for line in [
+            "BEGIN:VALARM",
+            f"TRIGGER:-PT{alarm_minutes}M",
+            f"DESCRIPTION:{escape_text(f'Reminder: {title}')}",
+            "ACTION:DISPLAY",
+            "END:VALARM",
+        ])
 
-    # End the ICS content
-    ics_content += """END:VCALENDAR
-"""
+    def render(self, invite_id, dtstamp, sequence=0):
+        invite_link = f"{INVITE_BASE_URL}/{invite_id}"
+        description = f"{self.description}\n\nLink to invite: {invite_link}"
+        return ''.join([
+            "BEGIN:VEVENT" + CRLF,
+            fold_line(f"UID:{invite_id}-{self.key}@{UID_DOMAIN}"),
+            f"DTSTAMP:{dtstamp}" + CRLF,
+            f"SEQUENCE:{sequence}" + CRLF,
+            self._static,
+            fold_line(f"DESCRIPTION:{escape_text(description)}"),
+            fold_line(f"URL:{invite_link}"),
+            self._alarm,
+            "END:VEVENT" + CRLF,
+        ])
+
+EVENT_TEMPLATES = {key: EventTemplate(key, **event) for key, event in EVENTS.items()}
 
-    return ics_content
+CALENDAR_HEADER = ''.join(fold_line(line) for line in [
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    f"PRODID:{PRODID}",
+    "CALSCALE:GREGORIAN",
+    "METHOD:PUBLISH",
+])
+CALENDAR_FOOTER = "END:VCALENDAR" + CRLF
+
+@lru_cache(maxsize=None)
+def calendar_header(event_keys):
+    """Calendar header plus one VTIMEZONE per distinct zone used by the events."""
+    zones = dict.fromkeys((EVENT_TEMPLATES[key].tzid, EVENT_TEMPLATES[key].year) for key in event_keys)
+    return CALENDAR_HEADER + ''.join(vtimezone(tzid, year) for tzid, year in zones)
+
+def invite_event_keys(invite):
+    """Events on an invite's calendar, from its invitedLocation."""
+    return tuple(LOCATION_EVENTS.get(invite.get('invitedLocation'), ['canada']))
+
+def invite_sequence(invite):
+    """
+    SEQUENCE for an invite's events: the invite's last update time in seconds,
+    so it increases whenever the invite (e.g. its RSVP) changes.
+    """
+    updated_at = invite.get('updatedAt')
+    return int(updated_at.replace(tzinfo=timezone.utc).timestamp()) if updated_at else 0
+
+def render_invite_calendar(invite_id, event_keys, dtstamp=None, sequence=0):
+    """Render one calendar holding the given events for an invite."""
+    dtstamp = dtstamp or utc_stamp()
+    events = ''.join(EVENT_TEMPLATES[key].render(invite_id, dtstamp, sequence) for key in event_keys)
+    return calendar_header(tuple(event_keys)) + events + CALENDAR_FOOTER
+
+class CalendarCache:
+    """
+    Thread-safe LRU cache of rendered invite calendars, keyed on
+    (invite id, event set, sequence). A changed invite gets a new sequence and
+    so a new key; invalidate() also drops its stale entries straight away.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_invite = {}
+        self._lock = threading.Lock()
+
+    def get(self, invite_id, event_keys, sequence=0):
+        key = (str(invite_id), tuple(event_keys), sequence)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        content = render_invite_calendar(key[0], key[1], sequence=sequence)
+
+        with self._lock:
+            self._entries[key] = content
+            self._keys_by_invite.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard_key(evicted)
+        return content
+
+    def get_for_invite(self, invite):
+        """Cached calendar for an invite document (reads _id, invitedLocation, updatedAt)."""
+        return self.get(invite['_id'], invite_event_keys(invite), invite_sequence(invite))
+
+    def invalidate(self, invite_id):
+        """Drop every cached calendar for an invite, e.g. after its RSVP changes."""
+        with self._lock:
+            for key in self._keys_by_invite.pop(str(invite_id), ()):
+                self._entries.pop(key, None)
+
+    def _discard_key(self, key):
+        keys = self._keys_by_invite.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_invite[key[0]]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+def generate_invite_calendars(invites, out_dir="out_ics", zip_path=None):
+    """
+    Write a personalised .ics for every invite.
+
+    Args:
+        invites: Iterable of invite documents (`_id`, `invitedLocation` and `updatedAt` are read).
+        out_dir (str): Folder for <invite_id>.ics files (ignored when zip_path is set).
+        zip_path (str): If set, write all calendars into this zip archive instead.
+
+    Returns:
+        int: Number of calendars written.
+    """
+    dtstamp = utc_stamp()  # one timestamp for the whole batch
+    count = 0
+
+    if zip_path:
+        os.makedirs(os.path.dirname(zip_path) or '.', exist_ok=True)
+        archive = zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        archive = None
+
+    try:
+        for invite in invites:
+            invite_id = str(invite['_id'])
+            content = render_invite_calendar(invite_id, invite_event_keys(invite), dtstamp, invite_sequence(invite))
+            if archive:
+                archive.writestr(f"{invite_id}.ics", content)
+            else:
+                with open(os.path.join(out_dir, f"{invite_id}.ics"), 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+            count += 1
+    finally:
+        if archive:
+            archive.close()
+
+    return count
+
+def fetch_invites():
+    """Stream every invite's id and location from MongoDB."""
+    yield from get_collection('invites').find({}, {'invitedLocation': 1, 'updatedAt': 1})
 
 def save_ics(ics_content, filename="wedding_invite.ics"):
     """
@@ -69,22 +408,37 @@ def save_ics(ics_content, filename="wedding_invite.ics"):
         filename (str): The filename where the ICS content will be saved.
     """
     try:
-        with open(filename, 'w') as f:
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
             f.write(ics_content)
         print(f"ICS file saved successfully at {os.path.abspath(filename)}")
     except Exception as e:
         print(f"Error saving ICS file: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate wedding ICS calendar files')
+    parser.add_argument('--batch', action='store_true',
+                        help='Generate a personalised calendar for every invite in the database')
+    parser.add_argument('--out-dir', default='out_ics',
+                        help='Output folder for batch mode (default: out_ics)')
+    parser.add_argument('--zip',
+                        help='Write batch calendars into this zip archive instead of individual files')
+    args = parser.parse_args()
+
+    if args.batch:
+        count = generate_invite_calendars(fetch_invites(), out_dir=args.out_dir, zip_path=args.zip)
+        print(f"Generated {count} invite calendars in {os.path.abspath(args.zip or args.out_dir)}")
+        return
+
     # Event details
     event_title = "Nicholas & Natasha's Wedding"
-    start_datetime = "2025-08-23 22:00:00"  # Format: YYYY-MM-DD HH:MM:SS (local time)
-    end_datetime = "2025-08-24 00:00:00"   # Format: YYYY-MM-DD HH:MM:SS (local time)
+    start_datetime = "2025-08-23 22:00:00"  # Format: YYYY-MM-DD HH:MM:SS (Toronto time)
+    end_datetime = "2025-08-24 00:00:00"   # Format: YYYY-MM-DD HH:MM:SS (Toronto time)
     location = "Sheraton Parkway Toronto North Hotel & Suites, 600 Hwy 7, Richmond Hill, ON L4B 1B2"
     description = "Join us to celebrate the wedding of Nicholas and Natasha!"
-    
+
     # Generate ICS content
-    ics_content = generate_ics(event_title, start_datetime, end_datetime, location, description)
+    ics_content = generate_ics(event_title, start_datetime, end_datetime, location, description,
+                               tzid=EVENTS['canada']['tzid'])
 
     # Save ICS to file
     save_ics(ics_content)
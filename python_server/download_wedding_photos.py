@@ -2,27 +2,62 @@
 Download wedding photos from Cloudinary to local folders, separated by `location`.
 - Folders are created dynamically based on location values in the DB
 - Duplicate filenames are safely renamed to <filename>_<i>.<ext>
+- The Mongo cursor is streamed (with a projection) straight into a bounded
+  download queue, so downloads start on the first document and memory stays
+  flat for large galleries
+- Downloads run in parallel over a shared connection pool, with a cap on
+  concurrent requests per host
+- Completed downloads are recorded in a local index keyed on the photo `_id`
+  (path, size, sha256, uploadedAt), so rerunning the script skips files that
+  were already downloaded instead of duplicating them
+- Photos whose content hash matches an already downloaded file are not kept
+  twice; the index points them at the existing file
+- --incremental only queries photos uploaded since the newest `uploadedAt`
+  in the index, plus the photos that failed on earlier runs (also recorded in
+  the index)
 
 Requirements:
 - Folders are created dynamically based on location values in the DB
   pip install pymongo requests python-dotenv
 
 Usage:
-  python download_wedding_photos.py  (must be in the same dir as .env)
+  python download_wedding_photos.py [--incremental] [--workers 8] [--per-host 6] [--manifest <path>]
+  (must be in the same dir as .env)
 """
 
 import os
 import re
+import json
+import hashlib
+import argparse
+import threading
+import queue
+from datetime import datetime
+from urllib.parse import urlparse
 import requests
-from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bson import ObjectId
 from dotenv import load_dotenv
 
+from mongo_connection import get_collection
+
 load_dotenv()
 
 # ─── CONFIG ──────────────────────────────────────────────────────────
-MONGO_URI = f"mongodb+srv://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASS')}@{os.getenv('MONGO_CLUSTER')}.mongodb.net/?retryWrites=true&w=majority"
 MONGO_DB_NAME    = "db"
 PHOTO_COLLECTION = "photos"
+MANIFEST_PATH    = "./wedding_photos_manifest.jsonl"
+DEFAULT_WORKERS  = 8
+DEFAULT_PER_HOST = 6
+CHUNK_SIZE       = 64 * 1024
+QUEUE_DEPTH      = 4  # queued downloads per worker
+
+# Only the fields the downloader reads (plus the legacy aliases it falls back to)
+PHOTO_PROJECTION = {
+    "url": 1, "jpgUrl": 1, "publicId": 1, "location": 1, "mediaType": 1, "uploadedAt": 1,
+    "imageUrl": 1, "secure_url": 1, "public_id": 1,
+}
 
 # ─── HELPERS ─────────────────────────────────────────────────────────────────
 
@@ -39,92 +74,320 @@ def location_to_dir(location: str) -> str:
     slug = safe_filename(location.lower().replace(" ", "_"))
     return f"./wedding_photos_{slug}"
 
-def unique_path(folder: str, filename: str) -> str:
+def unique_path(folder: str, filename: str, taken: set) -> str:
     """
-    Return a unique file path in the folder.
-    If <filename> already exists, returns <stem>_<i>.<ext>.
+    Return a unique file path in the folder and mark it as taken.
+    `taken` holds the names already used in the folder (see folder_names), so
+    no filesystem probing is needed. If <filename> is taken, returns
+    <stem>_<i>.<ext>.
     """
-    dest = os.path.join(folder, filename)
-    if not os.path.exists(dest):
-        return dest
-
+    name = filename
     stem, ext = os.path.splitext(filename)
     i = 1
-    while True:
-        candidate = os.path.join(folder, f"{stem}_{i}{ext}")
-        if not os.path.exists(candidate):
-            return candidate
+    while name in taken:
+        name = f"{stem}_{i}{ext}"
         i += 1
+    taken.add(name)
+    return os.path.join(folder, name)
+
+def folder_names(cache: dict, folder: str) -> set:
+    """Names in `folder`, listed once per run and then tracked in memory."""
+    if folder not in cache:
+        os.makedirs(folder, exist_ok=True)
+        cache[folder] = set(os.listdir(folder))
+    return cache[folder]
+
+def make_session(workers: int) -> requests.Session:
+    """Shared keep-alive session with one pooled connection per worker."""
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class HostLimiter:
+    """Caps the number of concurrent requests to any single host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+class Manifest:
+    """
+    Append-only JSONL index of completed downloads, keyed on photo `_id`.
+    A photo counts as done if its recorded file still exists with the same size.
+    Entries also carry the content hash (for duplicate detection) and
+    `uploadedAt` (for the incremental sync watermark). Failed downloads are
+    recorded as `{"_id": ..., "failed": true}` lines until a later run succeeds,
+    so incremental syncs query them again even if they are older than the watermark.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.failed = set()  # ids of photos whose last attempt failed
+        self.by_hash = {}  # sha256 → path of the file holding that content
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from an interrupted run
+                    if entry.get("failed"):
+                        self.failed.add(entry["_id"])
+                        continue
+                    self.failed.discard(entry["_id"])
+                    self.entries[entry["_id"]] = entry
+                    if entry.get("sha256"):
+                        self.by_hash.setdefault(entry["sha256"], entry["path"])
+
+    def is_complete(self, photo_id) -> bool:
+        entry = self.entries.get(str(photo_id))
+        return bool(entry) and os.path.exists(entry["path"]) and os.path.getsize(entry["path"]) == entry["size"]
+
+    def watermark(self):
+        """Newest `uploadedAt` among indexed photos, or None if unknown."""
+        uploaded = [e["uploadedAt"] for e in self.entries.values() if e.get("uploadedAt")]
+        return datetime.fromisoformat(max(uploaded)) if uploaded else None
+
+    def record(self, photo_id, path: str, size: int, sha256: str, uploaded_at=None) -> dict:
+        """
+        Index a finished download. If the same content is already on disk under
+        another path, the new copy is deleted and the entry points at the
+        existing file (marked `duplicate_of`).
+        """
+        entry = {
+            "_id": str(photo_id),
+            "path": path,
+            "size": size,
+            "sha256": sha256,
+            "uploadedAt": uploaded_at.isoformat() if uploaded_at else None,
+        }
+        with self._lock:
+            existing = self.by_hash.get(sha256)
+            if existing and existing != path and os.path.exists(existing):
+                os.remove(path)
+                entry["path"] = existing
+                entry["duplicate_of"] = existing
+            else:
+                self.by_hash[sha256] = path
+            self.entries[entry["_id"]] = entry
+            self.failed.discard(entry["_id"])
+            self._append(entry)
+        return entry
+
+    def record_failure(self, photo_id):
+        """Index a failed download, so incremental syncs retry it."""
+        with self._lock:
+            self.failed.add(str(photo_id))
+            self._append({"_id": str(photo_id), "failed": True})
+
+    def failed_ids(self) -> list:
+        """Failed photo ids, as stored in MongoDB (ObjectId where the id is one)."""
+        with self._lock:
+            return [ObjectId(i) if ObjectId.is_valid(i) else i for i in self.failed]
+
+    def _append(self, entry: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+def fetch(session: requests.Session, host_limiter: HostLimiter, url: str, out_path: str):
+    """
+    Stream `url` to `out_path` and return (bytes written, sha256 hex digest).
+    Writes to a .part file first so an interrupted download is never mistaken
+    for a finished one.
+    """
+    tmp_path = out_path + ".part"
+    digest = hashlib.sha256()
+    try:
+        with host_limiter(url):
+            with session.get(url, timeout=30, stream=True) as resp:
+                resp.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return os.path.getsize(out_path), digest.hexdigest()
 
 # ─── MAIN ────────────────────────────────────────────────────────────────────
 
-def download():
+class Progress:
+    """Thread-safe tallies and progress lines shared by the download workers."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.counts = {}  # location → success count
+        self.errors = []
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def success(self, i, location, display_name, base):
+        with self._lock:
+            self.counts[location] = self.counts.get(location, 0) + 1
+            dupe_note = " (renamed duplicate)" if display_name != base else ""
+            print(f"  [{i}/{self.total}] ✓ [{location}] {display_name}{dupe_note}")
+
+    def duplicate(self, i, location, display_name, existing):
+        with self._lock:
+            self.duplicates += 1
+            print(f"  [{i}/{self.total}] = [{location}] {display_name} is identical to {existing}, not kept")
+
+    def error(self, photo_id, message):
+        with self._lock:
+            self.errors.append(photo_id)
+            print(message)
+
+def download_worker(jobs: queue.Queue, session, host_limiter, manifest, progress):
+    """Consume jobs from the queue until the None sentinel arrives."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        i, photo_id, uploaded_at, original_url, out_path, base, location = job
+        display_name = os.path.basename(out_path)
+        try:
+            size, sha256 = fetch(session, host_limiter, original_url, out_path)
+            entry = manifest.record(photo_id, out_path, size, sha256, uploaded_at)
+            if entry.get("duplicate_of"):
+                progress.duplicate(i, location, display_name, entry["duplicate_of"])
+            else:
+                progress.success(i, location, display_name, base)
+        except Exception as e:
+            manifest.record_failure(photo_id)
+            progress.error(photo_id, f"  [{i}/{progress.total}] ✗ ERROR downloading {display_name}: {e}")
+
+def download(workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+             manifest_path: str = MANIFEST_PATH, incremental: bool = False):
     print("=== Wedding Photo Downloader ===\n")
 
     print("Connecting to MongoDB...")
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB_NAME]
-    collection = db[PHOTO_COLLECTION]
+    collection = get_collection(PHOTO_COLLECTION, MONGO_DB_NAME)
 
-    photos = list(collection.find({}))
-    print(f"Found {len(photos)} total photos.\n")
+    manifest = Manifest(manifest_path)
+    query = {}
+    watermark = manifest.watermark() if incremental else None
+    if watermark:
+        # $gte, not $gt: photos saved in one batch share an uploadedAt, and the
+        # ones already indexed are skipped below anyway
+        query = {"uploadedAt": {"$gte": watermark}}
+        print(f"Incremental sync: photos uploaded since {watermark.isoformat()}")
+        failed_ids = manifest.failed_ids()
+        if failed_ids:
+            # Failed photos can be older than the watermark; query them by id
+            query = {"$or": [query, {"_id": {"$in": failed_ids}}]}
+            print(f"  plus {len(failed_ids)} photo(s) that failed on earlier runs")
 
-    errors = []
-    counts = {}  # location → success count
+    total = collection.count_documents(query)
+    print(f"Found {total} total photos.")
+    print(f"Downloading with {workers} workers ({per_host} per host)...\n")
 
-    for i, photo in enumerate(photos, 1):
-        # --- Adjust field names to match your Photo schema if needed ---
-        url       = photo.get("url") or photo.get("imageUrl") or photo.get("secure_url")
-        public_id = photo.get("publicId") or photo.get("public_id") or ""
-        location  = photo.get("location", "unknown")
-        # ----------------------------------------------------------------
+    session = make_session(workers)
+    host_limiter = HostLimiter(per_host)
+    progress = Progress(total)
+    skipped = 0
+    taken = {}  # folder → names already used in it
 
-        # Dynamically create folder for any new location
-        output_dir = location_to_dir(location)
-        os.makedirs(output_dir, exist_ok=True)
+    # Downloads start as soon as the first document arrives; the bounded queue
+    # keeps the cursor from running far ahead of the workers
+    jobs = queue.Queue(maxsize=workers * QUEUE_DEPTH)
+    threads = [
+        threading.Thread(
+            target=download_worker,
+            args=(jobs, session, host_limiter, manifest, progress),
+            daemon=True
+        )
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
 
-        if not url:
-            print(f"  [{i}] ✗ SKIP — no URL found for doc {photo.get('_id')}")
-            errors.append(photo.get("_id"))
-            continue
+    try:
+        for i, photo in enumerate(collection.find(query, PHOTO_PROJECTION), 1):
+            # --- Adjust field names to match your Photo schema if needed ---
+            url       = photo.get("url") or photo.get("imageUrl") or photo.get("secure_url")
+            public_id = photo.get("publicId") or photo.get("public_id") or ""
+            location  = photo.get("location", "unknown")
+            # ----------------------------------------------------------------
 
-        original_url = get_highest_quality_url(url)
+            if manifest.is_complete(photo.get("_id")):
+                skipped += 1
+                continue
 
-        # Derive base filename from public_id or URL
-        if public_id:
-            base = safe_filename(public_id.split("/")[-1])
-        else:
-            base = safe_filename(original_url.split("/")[-1].split("?")[0])
+            # Dynamically create folder for any new location
+            output_dir = location_to_dir(location)
+            names = folder_names(taken, output_dir)
 
-        if "." not in base:
-            base += ".jpg"
+            if not url:
+                manifest.record_failure(photo.get("_id"))
+                progress.error(photo.get("_id"), f"  [{i}] ✗ SKIP — no URL found for doc {photo.get('_id')}")
+                continue
 
-        # Get a unique path — renames duplicates to <stem>_<i>.<ext>
-        out_path = unique_path(output_dir, base)
-        display_name = os.path.basename(out_path)
+            original_url = get_highest_quality_url(url)
 
-        try:
-            resp = requests.get(original_url, timeout=30, stream=True)
-            resp.raise_for_status()
-            with open(out_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            counts[location] = counts.get(location, 0) + 1
-            dupe_note = " (renamed duplicate)" if display_name != base else ""
-            print(f"  [{i}/{len(photos)}] ✓ [{location}] {display_name}{dupe_note}")
-        except Exception as e:
-            print(f"  [{i}] ✗ ERROR downloading {display_name}: {e}")
-            errors.append(photo.get("_id"))
+            # Derive base filename from public_id or URL
+            if public_id:
+                base = safe_filename(public_id.split("/")[-1])
+            else:
+                base = safe_filename(original_url.split("/")[-1].split("?")[0])
+
+            if "." not in base:
+                base += ".jpg"
 
-    client.close()
+            # Get a unique path — renames duplicates to <stem>_<i>.<ext>
+            out_path = unique_path(output_dir, base, names)
+            jobs.put((i, photo.get("_id"), photo.get("uploadedAt"), original_url, out_path, base, location))
+    finally:
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+    session.close()
 
     print("\n=== Done ===")
-    for loc, count in sorted(counts.items()):
+    if skipped:
+        print(f"  Skipped {skipped} photos already downloaded (per {manifest_path}).")
+    for loc, count in sorted(progress.counts.items()):
         print(f"  {loc}: {count} photos → {location_to_dir(loc)}")
-    if errors:
-        print(f"\n  ✗ {len(errors)} error(s) — see above for details.")
+    if progress.duplicates:
+        print(f"  {progress.duplicates} duplicate(s) by content hash were not kept.")
+    if progress.errors:
+        print(f"\n  ✗ {len(progress.errors)} error(s) — see above for details. Rerun to retry them.")
     else:
         print("\nAll photos downloaded! Drag the folders into Google Drive.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download wedding photos from Cloudinary")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"Parallel downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help=f"Max concurrent requests to a single host (default: {DEFAULT_PER_HOST})")
+    parser.add_argument("--manifest", default=MANIFEST_PATH,
+                        help=f"Download index path (default: {MANIFEST_PATH})")
+    parser.add_argument("--incremental", "-i", action="store_true",
+                        help="Only fetch photos uploaded since the newest one in the index, "
+                             "plus earlier failures")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    download()
\ No newline at end of file
+    args = parse_args()
+    download(args.workers, args.per_host, args.manifest, args.incremental)
\ No newline at end of file
@@ -4,16 +4,43 @@ RSVP Report Generator
 
 This script fetches RSVP data from the wedding API and generates an Excel report
 with three separate tabs for attendees who have responded Yes, No, or haven't responded yet.
+
+Usage:
+  python generate_rsvp_report.py [--source api|mongo] [--format xlsx|csv|parquet] [--engine openpyxl|xlsxwriter]
+                                 [--incremental [--snapshot rsvp_report/rsvp_snapshot.json]]
+
+--source mongo skips the API and builds the summary directly in MongoDB,
+classifying guests the same way /api/rsvp-summary does: an $unwind/$project
+aggregation streams one small document per guest for the lists, and an
+$unwind/$group aggregation returns the guest counts by status and location
+that the report's totals and Status by Location tab are built from.
+
+--engine xlsxwriter streams the workbook in constant_memory mode and sizes the
+columns in the same pass (pip install XlsxWriter). --format csv/parquet write a
+single file with an RSVP category column instead of tabs (Parquet needs pyarrow).
+
+--incremental reads invites straight from MongoDB and keeps a snapshot of the
+last run (invite id -> guest statuses plus an updatedAt watermark) in
+rsvp_report/rsvp_snapshot.json. Later runs only fetch invites updated since the
+watermark (plus a cheap id-only scan to notice deleted invites), rebuild the
+totals from the snapshot, and add a Changes tab listing guests whose response
+moved to Yes or No since the previous run. The first run records a baseline.
 """
 
 import os
 import sys
+import csv
+import argparse
 import requests
 import pandas as pd
+import json
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
 
+from mongo_connection import get_collection
+from rsvp_analytics import RSVPAnalytics
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +55,58 @@ load_dotenv()
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:3003')
 RSVP_SUMMARY_ENDPOINT = '/api/rsvp-summary'
 
+RSVP_CATEGORIES = ['Yes', 'No', 'Not Responded']
+ATTENDING_STATUSES = ['Canada Only', 'Australia Only', 'Both Australia and Canada']
+NOT_ATTENDING_STATUS = 'Not Attending'
+
+# Mirrors /api/rsvp-summary: invites without an RSVP are 'Not Responded';
+# otherwise each guest is 'No', 'Yes', or 'Not Responded' if still pending.
+GUEST_CATEGORY = {'$switch': {
+    'branches': [
+        {'case': {'$ne': ['$hasRSVPd', True]}, 'then': 'Not Responded'},
+        {'case': {'$eq': ['$guests.attendingStatus', NOT_ATTENDING_STATUS]}, 'then': 'No'},
+        {'case': {'$in': ['$guests.attendingStatus', ATTENDING_STATUSES]}, 'then': 'Yes'},
+    ],
+    'default': 'Not Responded',
+}}
+
+# Guest counts per (category, status, location): a handful of small documents
+RSVP_COUNTS_PIPELINE = [
+    {'$unwind': '$guests'},
+    {'$group': {
+        '_id': {
+            'category': GUEST_CATEGORY,
+            'status': {'$ifNull': ['$guests.attendingStatus', '']},
+            'location': '$invitedLocation',
+        },
+        'count': {'$sum': 1},
+    }},
+]
+
+# One document per guest rather than grouped guest lists, so no result
+# document can outgrow MongoDB's 16MB limit however large the collection
+RSVP_SUMMARY_PIPELINE = [
+    {'$sort': {'_id': 1}},
+    {'$unwind': '$guests'},
+    {'$project': {
+        '_id': 0,
+        'category': GUEST_CATEGORY,
+        'guest': {
+            'name': {'$cond': [
+                {'$eq': [{'$ifNull': ['$guests.lastName', '']}, '']},
+                {'$ifNull': ['$guests.firstName', '']},
+                {'$concat': [{'$ifNull': ['$guests.firstName', '']}, ' ', '$guests.lastName']},
+            ]},
+            'inviteId': {'$toString': '$_id'},
+            'status': {'$ifNull': ['$guests.attendingStatus', '']},
+            'location': '$invitedLocation',
+            'dietaryRequirements': {'$ifNull': ['$guests.dietaryRequirements', '']},
+            'givenPlusOne': '$givenPlusOne',
+            'rsvpSubmittedAt': '$rsvpSubmittedAt',
+        },
+    }},
+]
+
 def fetch_rsvp_data():
     """Fetch RSVP data from the API endpoint"""
     try:
@@ -42,34 +121,124 @@ def fetch_rsvp_data():
         logger.error(f"Error fetching RSVP data: {e}")
         sys.exit(1)
 
-def create_excel_report(data):
-    """Create Excel report with three tabs for Yes, No, and Not Responded"""
+def fetch_rsvp_data_from_mongo(mongo_uri=None):
+    """
+    Build the RSVP summary directly in MongoDB.
+
+    Returns the same {'Yes': [...], 'No': [...], 'Not Responded': [...]} shape as
+    the API, plus 'Counts': a list of {'category', 'status', 'location', 'count'}.
+    """
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_dir = os.path.join(os.path.dirname(__file__), 'rsvp_report')
-        
-        # Create output directory if it doesn't exist
-        if not os.path.exists(out_dir):
-            os.makedirs(out_dir)
-            
-        file_path = os.path.join(out_dir, f"wedding_rsvp_report_{timestamp}.xlsx")
+        logger.info("Aggregating RSVP data in MongoDB")
+        collection = get_collection('invites', uri=mongo_uri)
+
+        data = {category: [] for category in RSVP_CATEGORIES}
+        for result in collection.aggregate(RSVP_SUMMARY_PIPELINE, allowDiskUse=True):
+            data[result['category']].append(result['guest'])
+        data['Counts'] = [
+            {**result['_id'], 'count': result['count']}
+            for result in collection.aggregate(RSVP_COUNTS_PIPELINE, allowDiskUse=True)
+        ]
+        return data
+    except Exception as e:
+        logger.error(f"Error aggregating RSVP data: {e}")
+        sys.exit(1)
+
+REPORT_DIR = os.path.join(os.path.dirname(__file__), 'rsvp_report')
+
+# (field in the RSVP data, column header in the report)
+REPORT_COLUMNS = [
+    ('name', 'Guest Name'),
+    ('status', 'RSVP Status'),
+    ('location', 'Invited Location'),
+    ('inviteId', 'Invite ID'),
+]
+
+# Columns of the Changes tab written in incremental mode
+CHANGE_COLUMNS = [
+    ('name', 'Guest Name'),
+    ('previous', 'Previous Category'),
+    ('category', 'New Category'),
+    ('status', 'RSVP Status'),
+    ('location', 'Invited Location'),
+    ('inviteId', 'Invite ID'),
+    ('updatedAt', 'Updated At'),
+]
+
+SNAPSHOT_PATH = os.path.join(REPORT_DIR, 'rsvp_snapshot.json')
+
+# Fields incremental mode reads from each invite
+INVITE_PROJECTION = {
+    'guests.firstName': 1,
+    'guests.lastName': 1,
+    'guests.attendingStatus': 1,
+    'guests.dietaryRequirements': 1,
+    'hasRSVPd': 1,
+    'givenPlusOne': 1,
+    'invitedLocation': 1,
+    'rsvpSubmittedAt': 1,
+    'updatedAt': 1,
+}
+
+REPORT_FORMATS = ['xlsx', 'csv', 'parquet']
+EXCEL_ENGINES = ['openpyxl', 'xlsxwriter']
+
+def report_path(extension, out_dir=REPORT_DIR):
+    """Timestamped report path in out_dir, creating the folder if needed"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, f"wedding_rsvp_report_{timestamp}.{extension}")
+
+def report_rows(guests, columns=REPORT_COLUMNS):
+    """Yield each guest as a list of cell values, in column order"""
+    for guest in guests:
+        yield [guest.get(field) for field, _ in columns]
+
+def report_sheets(data, analytics=None):
+    """
+    (sheet name, columns, rows) for each tab: the three categories, Changes if
+    present, then the analytics summary tables
+    """
+    sheets = [(status, REPORT_COLUMNS, data[status]) for status in RSVP_CATEGORIES]
+    if data.get('Changes') is not None:
+        sheets.append(('Changes', CHANGE_COLUMNS, data['Changes']))
+    if analytics is not None:
+        for name, table in analytics.summary_tables().items():
+            table = table.rename(columns=str)
+            sheets.append((name, [(col, col) for col in table.columns], table.to_dict('records')))
+    return sheets
+
+def cell_text(value):
+    return '' if value is None else str(value)
+
+def excel_value(value):
+    """Numbers stay numeric in the streamed workbook; everything else is written as text"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return cell_text(value)
+
+def create_excel_report(data, engine='openpyxl', out_dir=REPORT_DIR, analytics=None):
+    """
+    Create Excel report with three tabs for Yes, No, and Not Responded, plus
+    summary tabs when analytics is given
+    """
+    if engine == 'xlsxwriter':
+        return create_streaming_excel_report(data, out_dir, analytics)
+
+    try:
+        file_path = report_path('xlsx', out_dir)
         
         # Create a Pandas Excel writer using openpyxl as the engine
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
             
-            # Process each status category
-            for status in ['Yes', 'No', 'Not Responded']:
+            # Process each status category (and the Changes tab, if any)
+            for status, columns, rows in report_sheets(data, analytics):
                 # Convert the list of dictionaries to a dataframe
-                df = pd.DataFrame(data[status])
+                df = pd.DataFrame(rows)
                 
                 # Reorder and rename columns for better readability
-                columns_order = ['name', 'status', 'location', 'inviteId']
-                column_names = {
-                    'name': 'Guest Name', 
-                    'status': 'RSVP Status', 
-                    'location': 'Invited Location', 
-                    'inviteId': 'Invite ID'
-                }
+                columns_order = [field for field, _ in columns]
+                column_names = dict(columns)
                 
                 # Make sure all columns exist (even if empty)
                 for col in columns_order:
@@ -86,7 +255,7 @@ def create_excel_report(data):
                 worksheet = writer.sheets[status]
                 for i, col in enumerate(df.columns):
                     max_width = max(
-                        df[col].astype(str).map(len).max(),
+                        df[col].astype(str).map(len).max() if len(df) else 0,
                         len(col)
                     ) + 2  # Add padding
                     # Convert to Excel column width which is in characters
@@ -99,52 +268,297 @@ def create_excel_report(data):
         logger.error(f"Error creating Excel report: {e}")
         sys.exit(1)
 
-def generate_summary_statistics(data):
+def create_streaming_excel_report(data, out_dir=REPORT_DIR, analytics=None):
+    """
+    Same workbook as create_excel_report, written with xlsxwriter in
+    constant_memory mode: rows are streamed to disk as they are written and the
+    column widths are tracked in the same pass, with no DataFrame in between.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        logger.error("xlsxwriter is not installed - pip install XlsxWriter, or use --engine openpyxl")
+        sys.exit(1)
+
+    try:
+        file_path = report_path('xlsx', out_dir)
+        workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+        try:
+            for status, columns, rows in report_sheets(data, analytics):
+                worksheet = workbook.add_worksheet(status)
+                widths = [len(header) for _, header in columns]
+                worksheet.write_row(0, 0, [header for _, header in columns])
+
+                for row_number, row in enumerate(report_rows(rows, columns), start=1):
+                    worksheet.write_row(row_number, 0, [excel_value(value) for value in row])
+                    for i, value in enumerate(row):
+                        width = len(cell_text(value))
+                        if width > widths[i]:
+                            widths[i] = width
+
+                for i, width in enumerate(widths):
+                    worksheet.set_column(i, i, width + 2)  # Add padding
+        finally:
+            workbook.close()
+
+        logger.info(f"Excel report generated: {file_path}")
+        return file_path
+
+    except Exception as e:
+        logger.error(f"Error creating Excel report: {e}")
+        sys.exit(1)
+
+def create_csv_report(data, out_dir=REPORT_DIR):
+    """Write every guest to one CSV, with an RSVP category column in place of the tabs"""
+    try:
+        file_path = report_path('csv', out_dir)
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['RSVP Category'] + [header for _, header in REPORT_COLUMNS])
+            for status in RSVP_CATEGORIES:
+                writer.writerows([status] + row for row in report_rows(data[status]))
+
+        logger.info(f"CSV report generated: {file_path}")
+        return file_path
+
+    except Exception as e:
+        logger.error(f"Error creating CSV report: {e}")
+        sys.exit(1)
+
+def create_parquet_report(data, out_dir=REPORT_DIR):
+    """Write every guest to one Parquet file, with an RSVP category column (needs pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.error("pyarrow is not installed - pip install pyarrow, or use --format xlsx/csv")
+        sys.exit(1)
+
+    try:
+        file_path = report_path('parquet', out_dir)
+        schema = pa.schema([('RSVP Category', pa.string())] + [(header, pa.string()) for _, header in REPORT_COLUMNS])
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for status in RSVP_CATEGORIES:
+                guests = data[status]
+                columns = [[status] * len(guests)] + [
+                    [None if guest.get(field) is None else str(guest[field]) for guest in guests]
+                    for field, _ in REPORT_COLUMNS
+                ]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+        logger.info(f"Parquet report generated: {file_path}")
+        return file_path
+
+    except Exception as e:
+        logger.error(f"Error creating Parquet report: {e}")
+        sys.exit(1)
+
+def create_changes_csv(changes, report_file):
+    """Write the incremental Changes rows next to a CSV/Parquet report"""
+    file_path = os.path.splitext(report_file)[0] + '_changes.csv'
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([header for _, header in CHANGE_COLUMNS])
+        writer.writerows(report_rows(changes, CHANGE_COLUMNS))
+    logger.info(f"Changes written to: {file_path}")
+    return file_path
+
+def write_report(data, report_format='xlsx', engine='openpyxl', out_dir=REPORT_DIR, analytics=None):
+    """
+    Write the RSVP report in the requested format; returns the file path.
+    Summary tabs from analytics are only added to Excel reports.
+    """
+    if report_format == 'xlsx':
+        return create_excel_report(data, engine, out_dir, analytics)
+
+    if report_format == 'csv':
+        report_file = create_csv_report(data, out_dir)
+    else:
+        report_file = create_parquet_report(data, out_dir)
+    if data.get('Changes') is not None:
+        create_changes_csv(data['Changes'], report_file)
+    return report_file
+
+def guest_name(guest):
+    first_name = guest.get('firstName') or ''
+    last_name = guest.get('lastName') or ''
+    return f"{first_name} {last_name}" if last_name else first_name
+
+def classify_guest(has_rsvpd, status):
+    """RSVP category for a guest, matching /api/rsvp-summary and RSVP_SUMMARY_PIPELINE"""
+    if not has_rsvpd:
+        return 'Not Responded'
+    if status == NOT_ATTENDING_STATUS:
+        return 'No'
+    if status in ATTENDING_STATUSES:
+        return 'Yes'
+    return 'Not Responded'
+
+def snapshot_invite(invite):
+    """Compact snapshot entry for an invite: location and each guest's name, status and category"""
+    submitted_at = invite.get('rsvpSubmittedAt')
+    return {
+        'location': invite.get('invitedLocation'),
+        'givenPlusOne': invite.get('givenPlusOne', False),
+        'rsvpSubmittedAt': submitted_at.isoformat() if submitted_at else None,
+        'guests': [
+            {
+                'name': guest_name(guest),
+                'status': guest.get('attendingStatus', ''),
+                'category': classify_guest(invite.get('hasRSVPd'), guest.get('attendingStatus', '')),
+                'dietaryRequirements': guest.get('dietaryRequirements', ''),
+            }
+            for guest in invite.get('guests', [])
+        ],
+    }
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """The previous run's snapshot, or None if there isn't one"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """Write the snapshot atomically, so an interrupted run keeps the previous one"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def diff_invite(invite_id, previous, current, updated_at):
+    """Changes rows for guests of one invite whose category moved to Yes or No"""
+    previous_categories = {}
+    for guest in (previous or {}).get('guests', []):
+        previous_categories.setdefault(guest['name'], []).append(guest['category'])
+
+    changes = []
+    for guest in current['guests']:
+        earlier = previous_categories.get(guest['name'])
+        before = earlier.pop(0) if earlier else None
+        if guest['category'] in ('Yes', 'No') and guest['category'] != before:
+            changes.append({
+                'name': guest['name'],
+                'previous': before or 'New Guest',
+                'category': guest['category'],
+                'status': guest['status'],
+                'location': current['location'],
+                'inviteId': invite_id,
+                'updatedAt': updated_at,
+            })
+    return changes
+
+def summary_from_snapshot(snapshot):
+    """Rebuild the Yes/No/Not Responded lists from a snapshot, without querying"""
+    data = {category: [] for category in RSVP_CATEGORIES}
+    for invite_id, invite in sorted(snapshot['invites'].items()):
+        for guest in invite['guests']:
+            data[guest['category']].append({
+                'name': guest['name'],
+                'inviteId': invite_id,
+                'status': guest['status'],
+                'location': invite['location'],
+                'dietaryRequirements': guest.get('dietaryRequirements', ''),
+                'givenPlusOne': invite.get('givenPlusOne'),
+                'rsvpSubmittedAt': invite.get('rsvpSubmittedAt'),
+            })
+    return data
+
+def fetch_incremental_rsvp_data(snapshot_path=SNAPSHOT_PATH, mongo_uri=None):
+    """
+    Update the snapshot with invites changed since its watermark and return the
+    full summary, with the Changes rows under data['Changes'].
+    """
+    snapshot = load_snapshot(snapshot_path)
+    baseline = snapshot is None
+    if baseline:
+        snapshot = {'watermark': None, 'invites': {}}
+        logger.info("No RSVP snapshot found - fetching every invite for a baseline")
+
+    try:
+        invites = get_collection('invites', uri=mongo_uri)
+        query = {}
+        latest = datetime.fromisoformat(snapshot['watermark']) if snapshot['watermark'] else None
+        if latest:
+            # $gte re-reads invites updated in the watermark's own millisecond; unchanged ones diff to nothing
+            query = {'updatedAt': {'$gte': latest}}
+            logger.info(f"Fetching invites updated since {snapshot['watermark']}")
+
+        changes = []
+        fetched = 0
+        for invite in invites.find(query, INVITE_PROJECTION):
+            fetched += 1
+            invite_id = str(invite['_id'])
+            updated_at = invite.get('updatedAt')
+            current = snapshot_invite(invite)
+            if not baseline:
+                changes.extend(diff_invite(invite_id, snapshot['invites'].get(invite_id), current, updated_at))
+            snapshot['invites'][invite_id] = current
+            if updated_at and (latest is None or updated_at > latest):
+                latest = updated_at
+
+        # Deleted invites never show up in the watermark query; drop them by id
+        if not baseline:
+            live_ids = {str(invite['_id']) for invite in invites.find({}, {'_id': 1})}
+            for invite_id in set(snapshot['invites']) - live_ids:
+                del snapshot['invites'][invite_id]
+    except Exception as e:
+        logger.error(f"Error fetching changed invites: {e}")
+        sys.exit(1)
+
+    snapshot['watermark'] = latest.isoformat() if latest else None
+    save_snapshot(snapshot, snapshot_path)
+    logger.info(f"Fetched {fetched} invites, {len(changes)} new Yes/No responses")
+
+    data = summary_from_snapshot(snapshot)
+    data['Changes'] = None if baseline else changes
+    return data
+
+def generate_summary_statistics(data, analytics=None):
     """Generate and print summary statistics"""
-    yes_count = len(data['Yes'])
-    no_count = len(data['No'])
-    not_responded_count = len(data['Not Responded'])
-    total_guests = yes_count + no_count + not_responded_count
-    
-    # Calculate response rate
-    response_rate = ((yes_count + no_count) / total_guests) * 100 if total_guests > 0 else 0
-    
-    # Count by location for 'Yes' responses
-    location_counts = {}
-    for guest in data['Yes']:
-        location = guest.get('status', 'Unknown')
-        location_counts[location] = location_counts.get(location, 0) + 1
-    
-    print("\n===== WEDDING RSVP SUMMARY =====")
-    print(f"Total Guests: {total_guests}")
-    print(f"Attending: {yes_count} ({yes_count/total_guests*100:.1f}%)")
-    print(f"Not Attending: {no_count} ({no_count/total_guests*100:.1f}%)")
-    print(f"Not Responded: {not_responded_count} ({not_responded_count/total_guests*100:.1f}%)")
-    print(f"Response Rate: {response_rate:.1f}%")
-    
-    if location_counts:
-        print("\n----- Attending By Location -----")
-        for location, count in location_counts.items():
-            print(f"{location}: {count} guests ({count/yes_count*100:.1f}%)")
-    
-    print("================================\n")
+    analytics = analytics or RSVPAnalytics(data)
+    print(analytics.format_summary())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate the wedding RSVP Excel report')
+    parser.add_argument('--source', choices=['api', 'mongo'], default='api',
+                        help='Fetch RSVPs from the API (default) or aggregate them directly in MongoDB')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='xlsx',
+                        help='Report file format (default: xlsx)')
+    parser.add_argument('--engine', choices=EXCEL_ENGINES, default='openpyxl',
+                        help='Excel writer for --format xlsx (default: openpyxl)')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only fetch invites changed since the last run (reads MongoDB directly) and add a Changes tab')
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH,
+                        help=f'Snapshot file for --incremental (default: {SNAPSHOT_PATH})')
+    return parser.parse_args()
 
 def main():
     """Main function to run the script"""
+    args = parse_args()
     try:
         logger.info("Starting RSVP report generation")
         
-        # Fetch data from API
-        data = fetch_rsvp_data()
+        # Fetch data from the API, aggregate it directly in MongoDB, or update the last snapshot
+        if args.incremental:
+            data = fetch_incremental_rsvp_data(args.snapshot)
+        elif args.source == 'mongo':
+            data = fetch_rsvp_data_from_mongo()
+        else:
+            data = fetch_rsvp_data()
         
-        # Generate Excel report
-        excel_path = create_excel_report(data)
+        # Build the analytics once for both the report and the console summary
+        analytics = RSVPAnalytics(data)
+
+        # Generate the report
+        report_file = write_report(data, args.format, args.engine, analytics=analytics)
         
         # Print summary statistics
-        generate_summary_statistics(data)
+        generate_summary_statistics(data, analytics)
         
         logger.info("RSVP report generation completed successfully")
-        print(f"Excel report saved to: {excel_path}")
+        print(f"Report saved to: {report_file}")
         
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
@@ -0,0 +1,79 @@
+"""
+Guest-name parsing and dietary normalization shared by the senders and reports.
+
+  parse_household(guests)        "Nick Smith, Tash" -> [{'firstName': 'Nick', 'lastName': 'Smith'},
+                                                        {'firstName': 'Tash', 'lastName': 'Smith'}]
+  parse_households(series)       the same for every household in a column (a plain loop: pandas
+                                 string methods measured slower than it, see benchmarks/)
+  meaningful_dietary_mask(series) True where the dietary text is a real requirement, classifying
+                                 each distinct value once (guest lists repeat "none", "N/A", ...)
+
+A household's guests share its last name when exactly one distinct last name
+is written out in the household; otherwise guests without one get ''.
+Blank names (e.g. from a trailing comma) are dropped.
+"""
+
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# Values to treat as 'no dietary restriction', all cleaned (lowercase, no punctuation, no spaces)
+EXCLUDE_DIETARY = {"no", "none", "na", "nil", "nope", "notattending", "norestrictions"}
+
+NON_ALPHANUMERIC = re.compile(r'[^a-zA-Z0-9]')
+
+
+@lru_cache(maxsize=65536)
+def is_meaningful_dietary(val):
+    """Check if dietary requirement is meaningful (not empty or generic 'no' response)"""
+    # Remove punctuation and spaces, lowercase
+    cleaned = NON_ALPHANUMERIC.sub('', val).lower()
+    return bool(cleaned) and cleaned not in EXCLUDE_DIETARY
+
+
+def meaningful_dietary_mask(values):
+    """Boolean Series: which dietary values are meaningful. Each distinct value is classified once."""
+    text = values.fillna('').astype(str)
+    lookup = {value: is_meaningful_dietary(value) for value in text.unique()}
+    return text.map(lookup).astype(bool)
+
+
+def _guest_names(household):
+    if isinstance(household, str):
+        return household.split(',')
+    if isinstance(household, (list, tuple)):
+        return [str(name) for name in household]
+    if household is None or (isinstance(household, float) and pd.isna(household)):
+        return []
+    return str(household).split(',')
+
+
+def parse_household(guests):
+    """
+    Guest dicts for a single household (a list of names or a comma-separated
+    string), ready for the invite API: firstName, lastName, dietaryRequirements,
+    attendingStatus.
+    """
+    # split() collapses runs of whitespace; blank names (e.g. from a trailing comma) are dropped
+    split_names = [parts for parts in map(str.split, _guest_names(guests)) if parts]
+
+    # Share the household's last name when exactly one distinct one is written out
+    written = {' '.join(parts[1:]) for parts in split_names if len(parts) > 1}
+    shared = written.pop() if len(written) == 1 else ''
+
+    return [
+        {
+            'firstName': parts[0],
+            'lastName': ' '.join(parts[1:]) if len(parts) > 1 else shared,
+            'dietaryRequirements': '',
+            'attendingStatus': '',
+        }
+        for parts in split_names
+    ]
+
+
+def parse_households(households):
+    """Parse a Series of households into a Series, with the same index, of guest dict lists"""
+    return pd.Series([parse_household(guests) for guests in households.tolist()],
+                     index=households.index, dtype=object)
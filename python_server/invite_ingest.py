@@ -0,0 +1,217 @@
+"""
+Pre-flight ingestion of an invite CSV (Guests, email and optional plus one columns).
+
+Every row is checked up front with vectorized pandas operations, before any
+invite is created or email sent:
+
+  missing_guests     no guest names
+  missing_email      no email address
+  invalid_email      an address that is not user@domain.tld (addresses are
+                     separated by commas or semicolons)
+  invalid_plus_one   'plus one' is something other than yes / no / blank
+  duplicate_email    an address already used by an earlier row (the first row keeps it)
+  already_invited    a guest already has an invite for this location in MongoDB,
+                     found with one query for the whole file
+
+ingest_invites returns the clean rows as a work queue (original index kept,
+emails and 'plus one' normalized, guests parsed once into 'guest_data') and
+the rejected rows with their reason, so the sending phase only sees rows that
+can succeed.
+
+Usage (from python_server/):
+  python invite_ingest.py <csv> [--location Canada] [--skip-invited-check]
+"""
+
+import argparse
+import logging
+
+import pandas as pd
+
+from guest_normalization import parse_households
+
+REQUIRED_COLUMNS = ['Guests', 'email']
+OPTIONAL_COLUMNS = ['plus one']  # treated as blank when the CSV has no such column
+
+# Deliberately simple: one @, no whitespace, a dot in the domain
+EMAIL_PATTERN = r"[^@\s,;]+@[^@\s,;]+\.[A-Za-z]{2,}"
+
+PLUS_ONE_VALUES = {'yes': True, 'no': False, '': False}
+
+BOTH_LOCATIONS = 'Both Australia and Canada'
+
+
+class IngestResult:
+    """Outcome of ingest_invites: the clean work queue and the rejected rows"""
+
+    def __init__(self, queue, rejected):
+        self.queue = queue
+        self.rejected = rejected
+
+    def summary(self):
+        lines = [f"{len(self.queue)} rows ready, {len(self.rejected)} rejected"]
+        for reason, count in self.rejected['reason'].value_counts().items():
+            lines.append(f"  {reason}: {count}")
+        return "\n".join(lines)
+
+
+def load_invite_csv(path):
+    """Reads an invite CSV as text, so blank cells are '' rather than NaN"""
+    data = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = [column for column in REQUIRED_COLUMNS if column not in data.columns]
+    if missing:
+        raise ValueError(f"{path} is missing required columns: {', '.join(missing)}")
+    return with_optional_columns(data)
+
+
+def with_optional_columns(data):
+    missing = [column for column in OPTIONAL_COLUMNS if column not in data.columns]
+    return data.assign(**{column: '' for column in missing}) if missing else data
+
+
+def _split_column(values, separators=','):
+    """Separated cells → one stripped, non-blank item per row (row index repeated)"""
+    items = values.fillna('').astype(str).str.split(f'[{separators}]', regex=True).explode().str.strip()
+    return items[items != '']
+
+
+def _first_per_row(errors):
+    """Keep the first error message of each row"""
+    return errors[~errors.index.duplicated()]
+
+
+def validate_rows(data):
+    """
+    Row-level checks that need nothing but the CSV itself. Returns a frame with
+    the same index as data: guests, emails (lists), has_plus_one, reason, detail.
+    """
+    guests = _split_column(data['Guests'])
+    emails = _split_column(data['email'], separators=',;')
+    lowered = emails.str.lower()
+    # The same address twice on one row is sent once
+    repeated_in_row = pd.Series(list(zip(lowered.index, lowered))).duplicated().to_numpy()
+    emails, lowered = emails[~repeated_in_row], lowered[~repeated_in_row]
+
+    checked = pd.DataFrame(index=data.index)
+    checked['guests'] = guests.groupby(level=0).agg(list).reindex(data.index)
+    checked['emails'] = emails.groupby(level=0).agg(list).reindex(data.index)
+    plus_one = data['plus one'].fillna('').astype(str).str.strip().str.lower()
+    checked['has_plus_one'] = plus_one.map(PLUS_ONE_VALUES).fillna(False).astype(bool)
+    checked['reason'] = None
+    checked['detail'] = ''
+
+    def reject(details, reason):
+        """details: message per rejected row index. Earlier checks win, so each row has one reason"""
+        details = _first_per_row(details)
+        details = details[checked.loc[details.index, 'reason'].isna().to_numpy()]
+        checked.loc[details.index, 'reason'] = reason
+        checked.loc[details.index, 'detail'] = details
+
+    def flagged(mask):
+        return pd.Series('', index=mask.index[mask])
+
+    reject(flagged(checked['guests'].isna()), 'missing_guests')
+    reject(flagged(checked['emails'].isna()), 'missing_email')
+    reject(emails[~emails.str.fullmatch(EMAIL_PATTERN)], 'invalid_email')
+    reject(data['plus one'][~plus_one.isin(PLUS_ONE_VALUES.keys())], 'invalid_plus_one')
+
+    # An address may only belong to one household; rows already rejected don't claim it
+    addresses = pd.DataFrame({'row': lowered.index, 'address': lowered.to_numpy()})
+    addresses = addresses[checked.loc[addresses['row'], 'reason'].isna().to_numpy()]
+    repeated = addresses['address'].duplicated()
+    owner = dict(zip(addresses.loc[~repeated, 'address'], addresses.loc[~repeated, 'row']))
+    repeats = addresses[repeated]
+    reject(pd.Series([f"{address} (row {owner[address]})" for address in repeats['address']],
+                     index=repeats['row'].to_numpy(), dtype=object), 'duplicate_email')
+    return checked
+
+
+def _name_keys(first_names, last_names):
+    """Case- and whitespace-insensitive 'first last' keys"""
+    full = first_names.fillna('').astype(str) + ' ' + last_names.fillna('').astype(str)
+    return full.str.lower().str.split().str.join(' ')
+
+
+def find_invited_guests(guest_data, collection, location, known_invite_ids=()):
+    """
+    Rows (index of guest_data) with a guest who already has an invite for
+    location, mapped to 'Guest Name (invite <id>)'. One query covers every row.
+    Invites in known_invite_ids (created by an earlier run of this campaign,
+    see send_journal) don't count.
+    """
+    guests = guest_data.explode().dropna()
+    if guests.empty:
+        return pd.Series(dtype=object)
+    guests = pd.DataFrame(guests.tolist(), index=guests.index)
+    guests['key'] = _name_keys(guests['firstName'], guests['lastName'])
+
+    # Names are compared case-insensitively, so fetch the location's invites (names only) and match here
+    query = {'invitedLocation': {'$in': [location, BOTH_LOCATIONS]}}
+    existing = [
+        (guest.get('firstName'), guest.get('lastName'), str(invite['_id']))
+        for invite in collection.find(query, {'guests.firstName': 1, 'guests.lastName': 1})
+        for guest in invite.get('guests', [])
+        if str(invite['_id']) not in known_invite_ids
+    ]
+    if not existing:
+        return pd.Series(dtype=object)
+    existing = pd.DataFrame(existing, columns=['firstName', 'lastName', 'inviteId'])
+    invite_by_key = dict(zip(_name_keys(existing['firstName'], existing['lastName']), existing['inviteId']))
+
+    invited = guests[guests['key'].isin(invite_by_key.keys())]
+    details = (invited['firstName'] + ' ' + invited['lastName']).str.strip() \
+        + ' (invite ' + invited['key'].map(invite_by_key) + ')'
+    return _first_per_row(details)
+
+
+def ingest_invites(data, collection=None, location='Canada', known_invite_ids=()):
+    """
+    Validates and dedups an invite DataFrame. With a collection, guests who
+    already have an invite for location are rejected too, unless the invite
+    is one of known_invite_ids.
+    """
+    data = with_optional_columns(data)
+    checked = validate_rows(data)
+    valid = checked['reason'].isna()
+
+    queue = data.loc[valid].copy()
+    queue['Guests'] = checked.loc[valid, 'guests'].str.join(', ')
+    queue['email'] = checked.loc[valid, 'emails'].str.join(', ')
+    queue['plus one'] = checked.loc[valid, 'has_plus_one'].map({True: 'yes', False: 'no'})
+    queue['guest_data'] = parse_households(queue['Guests'])
+
+    if collection is not None and not queue.empty:
+        invited = find_invited_guests(queue['guest_data'], collection, location, set(known_invite_ids))
+        checked.loc[invited.index, 'reason'] = 'already_invited'
+        checked.loc[invited.index, 'detail'] = invited
+        queue = queue.drop(index=invited.index)
+
+    failed = checked['reason'].notna()
+    rejected = data.loc[failed, ['Guests', 'email', 'plus one']].copy()
+    rejected['reason'] = checked.loc[failed, 'reason'].to_numpy()
+    rejected['detail'] = checked.loc[failed, 'detail'].to_numpy()
+    for index, row in rejected.iterrows():
+        logging.warning(f"Skipping row {index} ({row['Guests']}): {row['reason']} {row['detail']}".rstrip())
+    return IngestResult(queue, rejected.rename_axis('row'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate an invite CSV without sending anything')
+    parser.add_argument('csv', help='Invite CSV with Guests, email and plus one columns')
+    parser.add_argument('--location', default='Canada', help='Invite location to check (default: Canada)')
+    parser.add_argument('--skip-invited-check', action='store_true',
+                        help="Don't look up existing invites in MongoDB")
+    args = parser.parse_args()
+
+    collection = None
+    if not args.skip_invited_check:
+        from mongo_connection import get_collection
+        collection = get_collection('invites')
+
+    result = ingest_invites(load_invite_csv(args.csv), collection, args.location)
+    print(result.summary())
+    if not result.rejected.empty:
+        print(result.rejected.to_string())
+
+
+if __name__ == '__main__':
+    main()
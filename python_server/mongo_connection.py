@@ -0,0 +1,118 @@
+"""
+Shared MongoDB connections for the python_server scripts.
+
+Clients are created on first use rather than at import, so `--help`, argument
+errors and code paths that never touch the database skip the SRV lookup, TLS
+handshake and auth entirely. Each URI gets one pooled MongoClient per process,
+shared by every module that asks for it, and closed at exit.
+
+Usage:
+    from mongo_connection import get_collection, lazy_collection
+
+    invites = get_collection('invites')          # connects now (if not already)
+    photo_collection = lazy_collection('photos')  # connects on first method call
+
+Environment (.env):
+    MONGO_USER, MONGO_PASS, MONGO_CLUSTER   Atlas credentials for the default URI
+    MONGO_MAX_POOL_SIZE     Connections per client (default: 20)
+    MONGO_COMPRESSORS       Wire compression, e.g. "zstd,snappy,zlib" (default: "zlib";
+                            zstd and snappy need the zstandard / python-snappy packages)
+    MONGO_READ_PREFERENCE   e.g. "secondaryPreferred" to keep reports off the primary
+                            (default: "primary")
+
+Tests and benchmarks can swap in another client (e.g. mongomock) with use_client().
+"""
+
+import atexit
+import os
+import threading
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+DB_NAME = 'db'
+DEFAULT_MAX_POOL_SIZE = 20
+DEFAULT_COMPRESSORS = 'zlib'
+DEFAULT_READ_PREFERENCE = 'primary'
+
+_clients = {}  # uri (None for the .env cluster) → client
+_lock = threading.Lock()
+
+
+def default_uri():
+    """Atlas URI from MONGO_USER / MONGO_PASS / MONGO_CLUSTER"""
+    user = os.getenv('MONGO_USER')
+    password = os.getenv('MONGO_PASS')
+    cluster = os.getenv('MONGO_CLUSTER')
+    if not all([user, password, cluster]):
+        raise RuntimeError("Missing one or more required MongoDB environment variables (MONGO_USER, MONGO_PASS, MONGO_CLUSTER).")
+    return f"mongodb+srv://{user}:{password}@{cluster}.mongodb.net/{DB_NAME}?retryWrites=true&w=majority"
+
+
+def client_options():
+    """MongoClient keyword options from the environment"""
+    return {
+        'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', DEFAULT_MAX_POOL_SIZE)),
+        'compressors': os.getenv('MONGO_COMPRESSORS', DEFAULT_COMPRESSORS),
+        'readPreference': os.getenv('MONGO_READ_PREFERENCE', DEFAULT_READ_PREFERENCE),
+    }
+
+
+def get_client(uri=None):
+    """The process-wide client for uri (default: the .env cluster), created on first call"""
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = MongoClient(uri or default_uri(), **client_options())
+            _clients[uri] = client
+        return client
+
+
+def get_db(name=DB_NAME, uri=None):
+    return get_client(uri)[name]
+
+
+def get_collection(name, db_name=DB_NAME, uri=None):
+    return get_client(uri)[db_name][name]
+
+
+def use_client(client, uri=None):
+    """Serve `client` for uri from now on, e.g. a mongomock client in tests and benchmarks"""
+    with _lock:
+        _clients[uri] = client
+
+
+def close_all():
+    """Close every client opened through this module"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_all)
+
+
+class LazyCollection:
+    """
+    Stand-in for a module-level collection: resolves the collection (and the
+    client) on first attribute access, then delegates everything to it.
+    """
+
+    def __init__(self, name, db_name=DB_NAME, uri=None):
+        self.name = name
+        self.db_name = db_name
+        self.uri = uri
+
+    def __getattr__(self, attribute):
+        return getattr(get_collection(self.name, self.db_name, self.uri), attribute)
+
+    def __repr__(self):
+        return f"LazyCollection({self.db_name}.{self.name})"
+
+
+def lazy_collection(name, db_name=DB_NAME, uri=None):
+    return LazyCollection(name, db_name, uri)
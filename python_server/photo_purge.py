@@ -0,0 +1,228 @@
+"""
+Batched purge of wedding photos from MongoDB and Cloudinary.
+
+Walks the photos collection in ascending _id ranges of --batch-size documents
+instead of one large delete_many, so each delete is short and progress is
+reported as it goes. For every batch, the Cloudinary assets behind the photo
+URLs are deleted first (up to 100 per Admin API call, several calls in
+parallel), then the batch's database rows. Rows whose asset deletion failed
+are kept, so rerunning the purge retries them.
+
+Filters:
+  --location canada|australia|all    matches the stored 'Canada'/'Australia'
+  --before / --after YYYY-MM-DD      uploadedAt range
+  --uploaded-by <name>               uploader username
+
+Usage:
+  python photo_purge.py [--location all] [--before 2025-09-01] [--after ...] [--uploaded-by Guest]
+                        [--batch-size 500] [--workers 4] [--dry-run] [--yes]
+                        [--skip-assets | --stub-assets]
+  (must be in the same dir as .env)
+
+--dry-run only counts and lists what would be deleted. --skip-assets deletes
+database rows only; --stub-assets uses an in-memory Cloudinary stand-in.
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from cloudinary_client import MAX_IDS_PER_DELETE, CloudinaryClient, StubCloudinaryClient, parse_asset_url
+from mongo_connection import get_collection
+
+load_dotenv()
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+LOCATION_CHOICES = ['all', 'canada', 'australia']
+PURGE_PROJECTION = {"url": 1, "jpgUrl": 1}
+DELETED_STATUSES = {"deleted", "not_found"}  # either way the asset is gone
+
+
+def purge_query(location_filter: str = "all", before: Optional[datetime] = None,
+                after: Optional[datetime] = None, uploaded_by: Optional[str] = None) -> dict:
+    """Photo query for the purge filters; locations are stored title-cased ('Canada')."""
+    query = {}
+    if location_filter != "all":
+        query["location"] = location_filter.title()
+    if before or after:
+        query["uploadedAt"] = {}
+        if after:
+            query["uploadedAt"]["$gte"] = after
+        if before:
+            query["uploadedAt"]["$lt"] = before
+    if uploaded_by:
+        query["uploadedBy"] = uploaded_by
+    return query
+
+
+def photo_assets(photo: dict) -> set:
+    """(resource_type, delivery_type, public_id) of every Cloudinary asset a photo row points at."""
+    assets = set()
+    for field in ("url", "jpgUrl"):
+        asset = parse_asset_url(photo.get(field))
+        if asset:
+            assets.add(asset)
+    return assets
+
+
+class PurgeStats:
+    def __init__(self, total: int):
+        self.total = total
+        self.scanned = 0
+        self.rows_deleted = 0
+        self.assets_deleted = 0
+        self.assets_failed = 0
+        self.started = time.perf_counter()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"  {self.scanned}/{self.total} scanned, {self.rows_deleted} rows and "
+              f"{self.assets_deleted} assets deleted, {self.assets_failed} asset failures ({elapsed:.1f}s)")
+
+
+def delete_assets(cloudinary, executor: ThreadPoolExecutor, assets: set) -> set:
+    """Delete assets concurrently in chunks of MAX_IDS_PER_DELETE; returns the ones that failed."""
+    grouped = defaultdict(list)
+    for resource_type, delivery_type, public_id in assets:
+        grouped[(resource_type, delivery_type)].append(public_id)
+
+    futures = {}
+    for (resource_type, delivery_type), public_ids in grouped.items():
+        for i in range(0, len(public_ids), MAX_IDS_PER_DELETE):
+            chunk = public_ids[i:i + MAX_IDS_PER_DELETE]
+            future = executor.submit(cloudinary.delete_resources, chunk, resource_type, delivery_type)
+            futures[future] = (resource_type, delivery_type, chunk)
+
+    failed = set()
+    for future, (resource_type, delivery_type, chunk) in futures.items():
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"  Cloudinary delete failed for {len(chunk)} {resource_type} assets: {e}")
+            results = {}
+        for public_id in chunk:
+            if results.get(public_id) not in DELETED_STATUSES:
+                failed.add((resource_type, delivery_type, public_id))
+    return failed
+
+
+def purge_photos(collection, query: dict, cloudinary=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 workers: int = DEFAULT_WORKERS, dry_run: bool = False) -> PurgeStats:
+    """
+    Delete photos matching `query`, batch by batch in _id order, removing their
+    Cloudinary assets first when a client is given.
+    """
+    stats = PurgeStats(collection.count_documents(query))
+    last_id = None
+    executor = ThreadPoolExecutor(max_workers=workers) if cloudinary and not dry_run else None
+    try:
+        while True:
+            range_query = dict(query)
+            if last_id is not None:
+                range_query["_id"] = {"$gt": last_id}
+            batch = list(collection.find(range_query, PURGE_PROJECTION).sort("_id", 1).limit(batch_size))
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+            stats.scanned += len(batch)
+
+            assets_by_photo = {photo["_id"]: photo_assets(photo) for photo in batch}
+            batch_assets = set().union(*assets_by_photo.values())
+
+            if dry_run:
+                if stats.scanned == len(batch):
+                    for photo in batch[:5]:
+                        print(f"  would delete {photo['_id']}: {photo.get('url')}")
+                stats.rows_deleted += len(batch)
+                stats.assets_deleted += len(batch_assets)
+                continue
+
+            failed = delete_assets(cloudinary, executor, batch_assets) if executor else set()
+            stats.assets_deleted += len(batch_assets) - len(failed)
+            stats.assets_failed += len(failed)
+
+            ids = [photo_id for photo_id, assets in assets_by_photo.items() if not assets & failed]
+            if ids:
+                # Bounded by the batch's _id range so the delete only touches one index range
+                result = collection.delete_many({"_id": {"$gte": batch[0]["_id"], "$lte": last_id, "$in": ids}})
+                stats.rows_deleted += result.deleted_count
+            stats.report()
+    finally:
+        if executor:
+            executor.shutdown()
+    return stats
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Delete wedding photos and their Cloudinary assets in batches")
+    parser.add_argument("--location", "-l", choices=LOCATION_CHOICES, default="all",
+                        help="Only photos from this location (default: all)")
+    parser.add_argument("--before", type=parse_date, help="Only photos uploaded before this date (YYYY-MM-DD)")
+    parser.add_argument("--after", type=parse_date, help="Only photos uploaded on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--uploaded-by", help="Only photos uploaded by this username")
+    parser.add_argument("--batch-size", "-b", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Photos per delete batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent Cloudinary delete calls (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only report what would be deleted")
+    parser.add_argument("--yes", "-y", action="store_true", help="Skip the confirmation prompt")
+    assets = parser.add_mutually_exclusive_group()
+    assets.add_argument("--skip-assets", action="store_true", help="Delete database rows only")
+    assets.add_argument("--stub-assets", action="store_true", help="Use an in-memory Cloudinary stand-in")
+    return parser.parse_args()
+
+
+def cloudinary_for(args):
+    """Cloudinary client for the CLI flags, or None when assets are skipped."""
+    if args.skip_assets:
+        return None
+    if args.stub_assets:
+        return StubCloudinaryClient()
+    cloudinary = CloudinaryClient.from_env(pool_size=args.workers)
+    if cloudinary is None and not args.dry_run:
+        raise SystemExit("Cloudinary credentials are not set (CLOUDINARY_URL or CLOUDINARY_CLOUD_NAME/"
+                         "CLOUDINARY_API_KEY/CLOUDINARY_API_SECRET); pass --skip-assets to delete rows only")
+    return cloudinary
+
+
+def main():
+    args = parse_args()
+    query = purge_query(args.location, args.before, args.after, args.uploaded_by)
+    cloudinary = cloudinary_for(args)
+
+    try:
+        collection = get_collection("photos")
+        count = collection.count_documents(query)
+        if count == 0:
+            print(f"No photos match {query or 'all photos'}")
+            return
+
+        print(f"Found {count} photos matching {query or 'all photos'}")
+        if not args.dry_run and not args.yes:
+            target = "database rows only" if cloudinary is None else "database rows and Cloudinary assets"
+            confirm = input(f"Are you sure you want to delete {count} photos ({target})? (yes/no): ")
+            if confirm.lower() != "yes":
+                print("Deletion cancelled.")
+                return
+
+        stats = purge_photos(collection, query, cloudinary, args.batch_size, args.workers, args.dry_run)
+        verb = "Would delete" if args.dry_run else "Deleted"
+        print(f"{verb} {stats.rows_deleted} photos and {stats.assets_deleted} Cloudinary assets"
+              + (f"; {stats.assets_failed} assets failed and their rows were kept" if stats.assets_failed else ""))
+    finally:
+        if cloudinary:
+            cloudinary.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+RSVP analytics for the report generator.
+
+RSVPAnalytics builds one guest DataFrame from an RSVP summary (the
+{'Yes': [...], 'No': [...], 'Not Responded': [...]} shape returned by
+/api/rsvp-summary and generate_rsvp_report) and derives every statistic from
+it with pandas, once:
+
+  totals / response_rate      guests per category and share who have responded
+  status_by_location          RSVP status x invited location crosstab
+  attending_by_location       attending guests per invited location
+  responses_over_time         responses and cumulative response rate per day
+  dietary_breakdown           dietary requirements of attending guests
+  plus_one_breakdown          RSVP category x givenPlusOne crosstab
+
+The same object feeds the console summary (format_summary) and the Summary
+tabs of the Excel report (summary_tables), so nothing is recomputed. When the
+summary carries server-side 'Counts' (generate_rsvp_report's MongoDB source:
+guests per category, status and location), the totals and the status by
+location table are taken from them instead of being counted here.
+
+The date, dietary and plus-one breakdowns need rsvpSubmittedAt,
+dietaryRequirements and givenPlusOne on each guest. The MongoDB sources of
+generate_rsvp_report include them; /api/rsvp-summary does not, so those
+breakdowns are empty for API reports.
+"""
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from guest_normalization import meaningful_dietary_mask
+
+RSVP_CATEGORIES = ['Yes', 'No', 'Not Responded']
+
+GUEST_COLUMNS = ['name', 'status', 'location', 'inviteId', 'dietaryRequirements', 'givenPlusOne', 'rsvpSubmittedAt']
+
+COUNT_COLUMNS = ['category', 'status', 'location', 'count']
+
+
+def percentage(count, total):
+    """count as a percentage of total, 0 when total is 0"""
+    return count / total * 100 if total else 0.0
+
+
+class RSVPAnalytics:
+    """Statistics over every guest in an RSVP summary, each computed on first use"""
+
+    def __init__(self, data):
+        frames = []
+        for category in RSVP_CATEGORIES:
+            frame = pd.DataFrame(data.get(category) or [], columns=GUEST_COLUMNS)
+            frame['category'] = category
+            frames.append(frame)
+        guests = pd.concat(frames, ignore_index=True)
+        guests['category'] = pd.Categorical(guests['category'], categories=RSVP_CATEGORIES)
+        guests['location'] = guests['location'].fillna('Unknown')
+        guests['status'] = guests['status'].fillna('')
+        guests['rsvpSubmittedAt'] = pd.to_datetime(guests['rsvpSubmittedAt'], errors='coerce', utc=True)
+        self.guests = guests
+
+        counts = pd.DataFrame(data.get('Counts') or [], columns=COUNT_COLUMNS)
+        counts['location'] = counts['location'].fillna('Unknown')
+        counts['status'] = counts['status'].fillna('')
+        self.counts = counts if not counts.empty else None
+
+    @cached_property
+    def totals(self):
+        """Guests per RSVP category"""
+        if self.counts is not None:
+            return self.counts.groupby('category')['count'].sum().reindex(RSVP_CATEGORIES, fill_value=0)
+        return self.guests['category'].value_counts().reindex(RSVP_CATEGORIES, fill_value=0)
+
+    @property
+    def total_guests(self):
+        return int(self.totals.sum())
+
+    @property
+    def response_rate(self):
+        return percentage(self.totals['Yes'] + self.totals['No'], self.total_guests)
+
+    @cached_property
+    def status_by_location(self):
+        """Guests per RSVP status (rows) and invited location (columns), with totals"""
+        if self.counts is not None:
+            counts = self.counts.assign(status=self.counts['status'].replace('', 'No Response'))
+            table = counts.pivot_table(index='status', columns='location', values='count',
+                                       aggfunc='sum', fill_value=0, margins=True, margins_name='Total')
+            return table.astype(int)
+        status = self.guests['status'].replace('', 'No Response')
+        return pd.crosstab(status, self.guests['location'], margins=True, margins_name='Total')
+
+    @cached_property
+    def attending_by_location(self):
+        """Attending guests per invited location"""
+        attending = self.guests.loc[self.guests['category'] == 'Yes', 'location']
+        return attending.value_counts()
+
+    @cached_property
+    def responses_over_time(self):
+        """Responses per day, with the cumulative response rate over all guests"""
+        responded = self.guests[self.guests['category'].isin(['Yes', 'No'])]
+        dates = responded['rsvpSubmittedAt'].dropna()
+        if dates.empty:
+            return pd.DataFrame(columns=['responses', 'cumulative', 'response_rate'])
+        per_day = dates.dt.floor('D').value_counts().sort_index()
+        per_day.index = per_day.index.date
+        cumulative = per_day.cumsum()
+        return pd.DataFrame({
+            'responses': per_day,
+            'cumulative': cumulative,
+            'response_rate': np.round(cumulative / self.total_guests * 100, 1),
+        }).rename_axis('date')
+
+    @cached_property
+    def dietary_breakdown(self):
+        """Attending guests per dietary requirement (case-insensitive), meaningful ones only"""
+        dietary = self.guests.loc[self.guests['category'] == 'Yes', 'dietaryRequirements'].dropna().astype(str)
+        meaningful = dietary[meaningful_dietary_mask(dietary)]
+        return meaningful.str.strip().str.capitalize().value_counts()
+
+    @cached_property
+    def plus_one_breakdown(self):
+        """Guests per RSVP category, split by whether their invite was given a plus one"""
+        known = self.guests.dropna(subset=['givenPlusOne'])
+        if known.empty:
+            return pd.DataFrame()
+        plus_one = known['givenPlusOne'].astype(bool).map({True: 'Plus One', False: 'No Plus One'})
+        return pd.crosstab(known['category'], plus_one, dropna=False)
+
+    def summary_tables(self):
+        """Summary tables for the Excel report: {sheet name: flat DataFrame}, empty ones left out"""
+        # Counts and percentages get separate columns, so the counts stay integers;
+        # the Responded row's share is the response rate
+        total = self.total_guests
+        counts = [int(self.totals[c]) for c in RSVP_CATEGORIES] + [total, int(self.totals['Yes'] + self.totals['No'])]
+        overview = pd.DataFrame({
+            'Category': RSVP_CATEGORIES + ['Total', 'Responded'],
+            'Guests': counts,
+            'Share (%)': [round(percentage(count, total), 1) for count in counts],
+        })
+        tables = {
+            'Summary': overview,
+            'Status by Location': self.status_by_location.rename_axis('RSVP Status').reset_index(),
+            'Responses Over Time': self.responses_over_time.reset_index(),
+            'Dietary': self.dietary_breakdown.rename_axis('Dietary Requirement').reset_index(name='Guests'),
+            'Plus Ones': self.plus_one_breakdown.rename_axis('RSVP Category').reset_index(),
+        }
+        return {name: table for name, table in tables.items() if not table.empty and len(table.columns) > 1}
+
+    def format_summary(self):
+        """Console summary text"""
+        totals = self.totals
+        total = self.total_guests
+        lines = [
+            "",
+            "===== WEDDING RSVP SUMMARY =====",
+            f"Total Guests: {total}",
+            f"Attending: {totals['Yes']} ({percentage(totals['Yes'], total):.1f}%)",
+            f"Not Attending: {totals['No']} ({percentage(totals['No'], total):.1f}%)",
+            f"Not Responded: {totals['Not Responded']} ({percentage(totals['Not Responded'], total):.1f}%)",
+            f"Response Rate: {self.response_rate:.1f}%",
+        ]
+
+        if not self.attending_by_location.empty:
+            lines += ["", "----- Attending By Location -----"]
+            for location, count in self.attending_by_location.items():
+                lines.append(f"{location}: {count} guests ({percentage(count, totals['Yes']):.1f}%)")
+
+        if not self.dietary_breakdown.empty:
+            lines += ["", "----- Dietary Requirements (Attending) -----"]
+            for requirement, count in self.dietary_breakdown.items():
+                lines.append(f"{requirement}: {count}")
+
+        lines += ["================================", ""]
+        return "\n".join(lines)
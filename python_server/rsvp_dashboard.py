@@ -0,0 +1,504 @@
+"""
+Live RSVP dashboard.
+
+A long-running service that keeps an in-memory materialized view of every
+invite and serves RSVP counts, guest lists, CSV exports and calendars over a
+small HTTP API. The view is loaded once, then kept current from a MongoDB
+change stream; on deployments without change streams (standalone mongod,
+mongomock) it falls back to polling for invites whose updatedAt moved past the
+last one seen. Responses are rendered once per view version, so repeated
+requests are served straight from memory.
+
+Endpoints:
+  GET /health
+  GET /api/counts                                  totals, by location, response rate
+  GET /api/guests?category=Yes&location=Canada     guest list as JSON (filters optional)
+  GET /api/guests.csv?category=Yes                 guest list as CSV
+  GET /api/invites/<id>.ics                        the invite's calendar (create_ics.CalendarCache)
+
+Usage:
+  python rsvp_dashboard.py [--host 127.0.0.1] [--port 8050] [--poll] [--poll-interval 5]
+  python rsvp_dashboard.py --uri mongodb://localhost:27017       (local mongod)
+  python rsvp_dashboard.py --mock [--mock-invites 500] [--simulate]
+    Serves a mongomock database seeded with synthetic invites; --simulate
+    keeps submitting random RSVPs so the view can be watched updating.
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from create_ics import CalendarCache
+from mongo_connection import get_collection, use_client
+from generate_rsvp_report import (
+    ATTENDING_STATUSES,
+    INVITE_PROJECTION,
+    NOT_ATTENDING_STATUS,
+    REPORT_COLUMNS,
+    RSVP_CATEGORIES,
+    snapshot_invite,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8050
+DEFAULT_POLL_INTERVAL = 5  # seconds
+DEFAULT_LOAD_TIMEOUT = 60  # seconds
+MAX_RETRY_DELAY = 60  # seconds
+ICS_PATH = re.compile(r'^/api/invites/([0-9a-fA-F]{24})\.ics$')
+
+
+class InviteView:
+    """
+    Thread-safe materialized view of the invites collection: one snapshot entry
+    per invite (generate_rsvp_report.snapshot_invite) plus guest counters per
+    (category, location) that are adjusted as invites change.
+    """
+
+    def __init__(self):
+        self.invites = {}
+        self.updated_at = {}
+        self.counts = Counter()
+        self.version = 0
+        self.last_change = None
+        self.calendars = CalendarCache()
+        self._lock = threading.RLock()
+
+    def _count(self, entry, sign):
+        for guest in entry['guests']:
+            self.counts[(guest['category'], entry['location'])] += sign
+
+    def _bump(self):
+        self.version += 1
+        self.last_change = datetime.now(timezone.utc)
+
+    def load(self, invites):
+        """Replace the view with a full set of invite documents"""
+        with self._lock:
+            self.invites.clear()
+            self.updated_at.clear()
+            self.counts.clear()
+            for invite in invites:
+                self._apply(invite)
+            self._bump()
+        return len(self.invites)
+
+    def apply(self, invite):
+        """Insert or replace one invite document"""
+        with self._lock:
+            self._apply(invite)
+            self._bump()
+
+    def _apply(self, invite):
+        invite_id = str(invite['_id'])
+        previous = self.invites.get(invite_id)
+        if previous is not None:
+            self._count(previous, -1)
+        entry = snapshot_invite(invite)
+        self.invites[invite_id] = entry
+        self.updated_at[invite_id] = invite.get('updatedAt')
+        self._count(entry, 1)
+        self.calendars.invalidate(invite_id)
+
+    def remove(self, invite_id):
+        invite_id = str(invite_id)
+        with self._lock:
+            entry = self.invites.pop(invite_id, None)
+            self.updated_at.pop(invite_id, None)
+            if entry is not None:
+                self._count(entry, -1)
+                self.calendars.invalidate(invite_id)
+                self._bump()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.invites)
+
+    def ids(self):
+        with self._lock:
+            return set(self.invites)
+
+    def updated(self, invite_id):
+        """The updatedAt the view holds for an invite"""
+        with self._lock:
+            return self.updated_at.get(invite_id)
+
+    def latest_update(self):
+        with self._lock:
+            return max((moment for moment in self.updated_at.values() if moment), default=None)
+
+    def summary(self):
+        """Guest totals per category and per location, and the response rate"""
+        with self._lock:
+            totals = {category: 0 for category in RSVP_CATEGORIES}
+            by_location = {}
+            for (category, location), count in self.counts.items():
+                if not count:
+                    continue
+                totals[category] += count
+                location_counts = by_location.setdefault(location or 'Unknown', {c: 0 for c in RSVP_CATEGORIES})
+                location_counts[category] += count
+            total = sum(totals.values())
+            return {
+                'invites': len(self.invites),
+                'guests': total,
+                'totals': totals,
+                'byLocation': by_location,
+                'responseRate': round((totals['Yes'] + totals['No']) / total * 100, 1) if total else 0.0,
+                'version': self.version,
+                'lastChange': self.last_change.isoformat() if self.last_change else None,
+            }
+
+    def guests(self, category=None, location=None):
+        """Guest rows (REPORT_COLUMNS fields plus category), optionally filtered"""
+        with self._lock:
+            rows = []
+            for invite_id, entry in self.invites.items():
+                if location and entry['location'] != location:
+                    continue
+                for guest in entry['guests']:
+                    if category and guest['category'] != category:
+                        continue
+                    rows.append({
+                        'name': guest['name'],
+                        'status': guest['status'],
+                        'location': entry['location'],
+                        'inviteId': invite_id,
+                        'category': guest['category'],
+                    })
+            return rows
+
+    def calendar(self, invite_id):
+        """The invite's .ics content, or None if the invite is not in the view"""
+        with self._lock:
+            entry = self.invites.get(invite_id)
+            if entry is None:
+                return None
+            invite = {'_id': invite_id, 'invitedLocation': entry['location'],
+                      'updatedAt': self.updated_at.get(invite_id)}
+        return self.calendars.get_for_invite(invite)
+
+
+class ViewUpdater(threading.Thread):
+    """
+    Loads the view, then follows changes: a change stream when the server
+    supports one, otherwise updatedAt polling every poll_interval seconds.
+    change_stream=False polls from the start (mongomock has no change streams).
+    While MongoDB is unreachable it retries with exponential backoff.
+    """
+
+    def __init__(self, collection, view, poll_interval=DEFAULT_POLL_INTERVAL, change_stream=True):
+        super().__init__(name='view-updater', daemon=True)
+        self.collection = collection
+        self.view = view
+        self.poll_interval = poll_interval
+        self.change_stream = change_stream
+        self.resume_token = None
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def load(self):
+        started = time.perf_counter()
+        count = self.view.load(self.collection.find({}, INVITE_PROJECTION))
+        logger.info(f"Loaded {count} invites in {time.perf_counter() - started:.2f}s")
+        self.ready.set()
+
+    def run(self):
+        if not self.change_stream:
+            logger.info(f"Polling for changes every {self.poll_interval}s")
+            self.poll()
+            return
+        delay = self.poll_interval
+        while not self.stop_event.is_set():
+            try:
+                self.watch()
+                return
+            except (OperationFailure, NotImplementedError) as e:
+                # Standalone mongod refuses to open a change stream
+                logger.info(f"Change streams unavailable ({e}); polling every {self.poll_interval}s")
+                self.poll()
+                return
+            except PyMongoError as e:
+                # e.g. ServerSelectionTimeoutError / ConnectionFailure before the stream opened
+                logger.warning(f"MongoDB unavailable ({e}); retrying in {delay:.0f}s")
+                if self.stop_event.wait(delay):
+                    return
+                delay = min(MAX_RETRY_DELAY, delay * 2)
+
+    def watch(self):
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace', 'delete']}}}]
+        while not self.stop_event.is_set():
+            # Open the stream before loading, so nothing changed during the load is missed
+            with self.collection.watch(pipeline, full_document='updateLookup',
+                                       resume_after=self.resume_token) as stream:
+                if self.resume_token is None:
+                    self.load()
+                logger.info("Following the invites change stream")
+                try:
+                    while not self.stop_event.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            self.stop_event.wait(0.1)
+                            continue
+                        self.resume_token = stream.resume_token
+                        self.apply_change(change)
+                except OperationFailure:
+                    raise
+                except PyMongoError as e:
+                    logger.warning(f"Change stream interrupted ({e}); resuming")
+
+    def apply_change(self, change):
+        invite_id = change['documentKey']['_id']
+        if change['operationType'] == 'delete' or change.get('fullDocument') is None:
+            self.view.remove(invite_id)
+        else:
+            self.view.apply(change['fullDocument'])
+
+    def poll(self):
+        delay = self.poll_interval
+        while not self.ready.is_set():
+            try:
+                self.load()
+            except PyMongoError as e:
+                logger.warning(f"Loading invites failed ({e}); retrying in {delay:.0f}s")
+                if self.stop_event.wait(delay):
+                    return
+                delay = min(MAX_RETRY_DELAY, delay * 2)
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except PyMongoError as e:
+                logger.warning(f"Poll failed: {e}")
+
+    def poll_once(self):
+        """Apply invites updated since the newest one in the view, then catch deletions"""
+        latest = self.view.latest_update()
+        query = {'updatedAt': {'$gte': latest}} if latest else {}
+        for invite in self.collection.find(query, INVITE_PROJECTION):
+            if invite.get('updatedAt') != self.view.updated(str(invite['_id'])):
+                self.view.apply(invite)
+
+        # Deleted invites never match the updatedAt query; only scan ids when the count says some went
+        if self.collection.count_documents({}) < len(self.view):
+            live_ids = {str(invite['_id']) for invite in self.collection.find({}, {'_id': 1})}
+            for invite_id in self.view.ids() - live_ids:
+                self.view.remove(invite_id)
+
+
+class DashboardServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, view):
+        super().__init__(address, DashboardHandler)
+        self.view = view
+        self._responses = {}
+        self._responses_version = None
+        self._responses_lock = threading.Lock()
+
+    def cached_response(self, key, render):
+        """Rendered response body for key, rendered at most once per view version"""
+        version = self.view.version
+        with self._responses_lock:
+            if self._responses_version != version:
+                self._responses = {}
+                self._responses_version = version
+            body = self._responses.get(key)
+        if body is None:
+            body = render()
+            with self._responses_lock:
+                if self._responses_version == version:
+                    self._responses[key] = body
+        return body
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    server_version = 'RSVPDashboard/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        category = params.get('category')
+        location = params.get('location')
+        view = self.server.view
+
+        if category and category not in RSVP_CATEGORIES:
+            return self.send_body(400, 'application/json',
+                                  json.dumps({'message': f"category must be one of {RSVP_CATEGORIES}"}).encode())
+
+        if url.path == '/health':
+            return self.send_body(200, 'application/json', b'{"status": "ok"}')
+
+        if url.path == '/api/counts':
+            body = self.server.cached_response('counts', lambda: json.dumps(view.summary()).encode())
+            return self.send_body(200, 'application/json', body)
+
+        if url.path == '/api/guests':
+            body = self.server.cached_response(
+                ('guests', category, location),
+                lambda: json.dumps(view.guests(category, location)).encode(),
+            )
+            return self.send_body(200, 'application/json', body)
+
+        if url.path == '/api/guests.csv':
+            body = self.server.cached_response(
+                ('guests.csv', category, location),
+                lambda: guests_csv(view.guests(category, location)),
+            )
+            return self.send_body(200, 'text/csv; charset=utf-8', body,
+                                  {'Content-Disposition': 'attachment; filename="guests.csv"'})
+
+        match = ICS_PATH.match(url.path)
+        if match:
+            content = view.calendar(match.group(1))
+            if content is None:
+                return self.send_body(404, 'application/json', b'{"message": "Invite not found"}')
+            return self.send_body(200, 'text/calendar; charset=utf-8', content.encode('utf-8'),
+                                  {'Content-Disposition': 'attachment; filename="wedding_invite.ics"'})
+
+        self.send_body(404, 'application/json', b'{"message": "Not found"}')
+
+    def send_body(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def guests_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['RSVP Category'] + [header for _, header in REPORT_COLUMNS])
+    writer.writerows([row['category']] + [row[field] for field, _ in REPORT_COLUMNS] for row in rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def seed_mock_invites(collection, count, seed=42):
+    """Fill a (mongomock) collection with synthetic invites"""
+    rng = random.Random(seed)
+    locations = ['Canada', 'Australia', 'Both Australia and Canada']
+    now = datetime.now(timezone.utc)
+    invites = []
+    for i in range(count):
+        has_rsvpd = rng.random() < 0.5
+        statuses = ATTENDING_STATUSES + [NOT_ATTENDING_STATUS]
+        invites.append({
+            '_id': ObjectId(),
+            'guests': [
+                {
+                    'firstName': f'Guest{i}_{g}',
+                    'lastName': f'Family{i}',
+                    'dietaryRequirements': rng.choice(['', '', 'Vegetarian', 'Gluten free']),
+                    'attendingStatus': rng.choice(statuses) if has_rsvpd else '',
+                }
+                for g in range(rng.randint(1, 4))
+            ],
+            'hasRSVPd': has_rsvpd,
+            'givenPlusOne': rng.random() < 0.2,
+            'invitedLocation': rng.choice(locations),
+            'rsvpSubmittedAt': now - timedelta(days=rng.randint(0, 60)),
+            'updatedAt': now - timedelta(days=rng.randint(0, 60)),
+        })
+    collection.insert_many(invites)
+
+
+def simulate_rsvps(collection, stop_event, interval=1.0):
+    """Submit a random RSVP every interval seconds, the way PUT /api/invites/:id does"""
+    rng = random.Random()
+    statuses = ATTENDING_STATUSES + [NOT_ATTENDING_STATUS]
+    while not stop_event.wait(interval):
+        pending = list(collection.find({'hasRSVPd': False}, {'guests': 1}).limit(50))
+        if not pending:
+            continue
+        invite = rng.choice(pending)
+        guests = [dict(guest, attendingStatus=rng.choice(statuses)) for guest in invite['guests']]
+        now = datetime.now(timezone.utc)
+        collection.update_one({'_id': invite['_id']}, {'$set': {
+            'guests': guests,
+            'hasRSVPd': True,
+            'rsvpSubmittedAt': now,
+            'updatedAt': now,
+        }})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve live RSVP counts, lists and CSV exports')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', '-p', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between polls when change streams are unavailable (default: {DEFAULT_POLL_INTERVAL})')
+    parser.add_argument('--load-timeout', type=float, default=DEFAULT_LOAD_TIMEOUT,
+                        help=f'Seconds to wait for the initial invite load before giving up (default: {DEFAULT_LOAD_TIMEOUT})')
+    parser.add_argument('--poll', action='store_true',
+                        help='Poll for changes instead of following a change stream (implied by --mock)')
+    parser.add_argument('--uri', help='MongoDB URI, e.g. mongodb://localhost:27017 (default: the .env cluster)')
+    parser.add_argument('--mock', action='store_true', help='Serve a mongomock database of synthetic invites')
+    parser.add_argument('--mock-invites', type=int, default=500, help='Synthetic invites for --mock (default: 500)')
+    parser.add_argument('--simulate', action='store_true', help='With --mock, keep submitting random RSVPs')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    stop_event = threading.Event()
+    if args.mock:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("mongomock is not installed - pip install mongomock")
+        use_client(mongomock.MongoClient())
+        collection = get_collection('invites')
+        seed_mock_invites(collection, args.mock_invites)
+        if args.simulate:
+            threading.Thread(target=simulate_rsvps, args=(collection, stop_event), daemon=True).start()
+    else:
+        collection = get_collection('invites', uri=args.uri)
+
+    view = InviteView()
+    updater = ViewUpdater(collection, view, args.poll_interval, change_stream=not (args.poll or args.mock))
+    updater.start()
+    # Serve a complete view from the first request
+    if not updater.ready.wait(args.load_timeout):
+        updater.stop()
+        raise SystemExit(f"Could not load the invites within {args.load_timeout:.0f}s; is MongoDB reachable?")
+
+    server = DashboardServer((args.host, args.port), view)
+    logger.info(f"RSVP dashboard on http://{args.host}:{args.port}/api/counts")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        updater.stop()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Append-only journal of an invite campaign, so a crashed or interrupted run can
+be resumed without re-creating invites or re-emailing households.
+
+Each household (keyed by its normalized guest names) moves through:
+
+  invite_created   the invite exists; invite_id / invite_link recorded
+  email_queued     about to hand the email to SMTP
+  email_sent       SMTP finished; email_sent is True or False (with error)
+
+plus `failed` when the row errored before its email was queued (e.g. invite
+creation failed). Every state change is one JSON line, written and flushed
+immediately, so a killed process loses nothing; os.fsync (which protects
+against power loss, not just process death) is batched every `fsync_every`
+records or `fsync_interval` seconds, and on close.
+
+On a rerun, load the journal and:
+  - skip households whose email was sent,
+  - reuse the invite of households that have one,
+  - resend households left at email_queued (the crash came mid-send, so they
+    may get the email twice - logged as a warning) or whose send failed.
+
+A torn last line from a crash mid-write is ignored when loading.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+STATES = ['invite_created', 'email_queued', 'email_sent', 'failed']
+
+RESULT_COLUMNS = ['guests', 'emails', 'invite_id', 'invite_link', 'email_sent', 'error', 'timestamp']
+
+
+def household_key(guests):
+    """Stable key for a household: its guest names, lowercased with whitespace collapsed"""
+    return ', '.join(' '.join(guest.lower().split()) for guest in guests)
+
+
+class SendJournal:
+    """Thread-safe JSONL journal; `entries` holds the latest state of every household"""
+
+    def __init__(self, path, fsync_every=20, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._load()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._ends_mid_line():
+            # Terminate a torn last line so the next record starts on its own line
+            self._file.write('\n')
+            self._file.flush()
+
+    def _ends_mid_line(self):
+        if not os.path.getsize(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        skipped = 0
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                self._apply(record)
+        logging.info(f"Loaded {len(self.entries)} households from journal {self.path}")
+        if skipped:
+            logging.warning(f"Ignored {skipped} unreadable journal lines (interrupted write)")
+
+    def _apply(self, record):
+        entry = self.entries.setdefault(record['key'], {})
+        entry.update({field: value for field, value in record.items() if field != 'key'})
+
+    def record(self, key, state, **fields):
+        """Appends a state change for a household and flushes it to the OS"""
+        if state not in STATES:
+            raise ValueError(f"Unknown journal state: {state}")
+        record = {'key': key, 'state': state, 'timestamp': datetime.now().isoformat(), **fields}
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._apply(record)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def state(self, key):
+        return self.entries.get(key, {}).get('state')
+
+    def invite_id(self, key):
+        """The household's invite ID if one was created in an earlier run"""
+        return self.entries.get(key, {}).get('invite_id')
+
+    def is_sent(self, key):
+        entry = self.entries.get(key, {})
+        return entry.get('state') == 'email_sent' and bool(entry.get('email_sent'))
+
+    def invite_ids(self):
+        return {entry['invite_id'] for entry in self.entries.values() if entry.get('invite_id')}
+
+    def result(self, key):
+        """Result record for a household, in the sent_invites CSV format"""
+        entry = self.entries.get(key, {})
+        result = {column: entry.get(column) for column in RESULT_COLUMNS}
+        result['email_sent'] = self.is_sent(key)
+        if entry.get('state') == 'email_queued':
+            result['error'] = 'Interrupted while sending; delivery unknown'
+        return result
+
+    def results(self, order=()):
+        """
+        Result records for every household in the journal: those in order first
+        (e.g. the audience's keys in row order, skipping any not in the journal),
+        then the rest in the order they first appeared
+        """
+        with self._lock:
+            first = [key for key in dict.fromkeys(order) if key in self.entries]
+            listed = set(first)
+            keys = first + [key for key in self.entries if key not in listed]
+        return [self.result(key) for key in keys]
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
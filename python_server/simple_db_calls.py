@@ -1,10 +1,13 @@
 import os
 import csv
 import argparse
-from pymongo import MongoClient
+from pymongo import UpdateMany, UpdateOne
 from bson import ObjectId
-from dotenv import load_dotenv
-import re
+
+from cloudinary_client import CloudinaryClient
+from guest_normalization import is_meaningful_dietary
+from mongo_connection import lazy_collection
+from photo_purge import purge_photos, purge_query
 
 '''
 python simple_db_calls.py --function dietary
@@ -18,303 +21,425 @@ python simple_db_calls.py --function attending [--location all|canada|australia]
 python simple_db_calls.py --function all_invites [--location all|canada|australia]
     Export all invites and their guests to out_db_calls/all_invites.csv
     Optional location filter: all (default), canada, or australia
+python simple_db_calls.py --function export_all [--exports dietary rsvp attending all_invites]
+    Run every export (and the canada/australia variants of the location-aware ones)
+    from a single scan of the invites collection
+    Optional --exports restricts which exports are written (default: all of them)
 python simple_db_calls.py --function reset_invite --invite_id <invite_id> [--given_plus_one true|false]
     Reset specific fields for an invite and optionally update givenPlusOne
+python simple_db_calls.py --function reset_invite --invite_id <id> <id> ... | --invite_file <path>
+    Reset many invites in one bulk write; the file holds one ID per line, or is a
+    CSV with an inviteId column (e.g. the all_invites export)
+python simple_db_calls.py --function reset_invite --location canada|australia [--status rsvpd|attending|not_attending] [--yes]
+    Reset every invite matching a location and/or RSVP status filter (asks for
+    confirmation unless --yes); prints matched/modified counts
 python simple_db_calls.py --function delete_photos [--location all|canada|australia]
-    Delete all photos from the database
+    Delete all photos from the database in batches, along with their Cloudinary
+    assets when Cloudinary credentials are set in .env
     Optional location filter: all (default), canada, or australia
+    (photo_purge.py adds date/uploader filters and --dry-run)
 '''
 
-load_dotenv()
+# Connected on first use (see mongo_connection), so --help and argument errors never touch the network
+invite_collection = lazy_collection('invites')
+photo_collection = lazy_collection('photos')
+
+ATTENDING_STATUSES = ['Canada Only', 'Australia Only', 'Both Australia and Canada']
+
+# Invites fetched per cursor round trip, and rows buffered per writerows call
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BUFFER_ROWS = 500
+LOCATION_CHOICES = ['all', 'canada', 'australia']
+
+class GuestExport:
+    """
+    A CSV export fed one guest at a time.
+
+    make_row(invite, guest) returns the CSV row for a guest, or None to skip them.
+    Because exports only see individual guests, any number of them can share a
+    single scan of the invites collection (see run_exports).
+
+    guest_fields / invite_fields list the document fields make_row reads, and
+    guest_filter is a Mongo condition a guest must meet to produce a row. They
+    are pushed into the query so MongoDB only returns matching invites, and only
+    the fields the exports need.
+    """
+    def __init__(self, filename, fieldnames, make_row, description, location_filter="all",
+                 guest_fields=(), invite_fields=(), guest_filter=None):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.make_row = make_row
+        self.description = description
+        self.location_filter = location_filter
+        self.guest_fields = guest_fields
+        self.invite_fields = invite_fields
+        self.guest_filter = guest_filter
+        self.row_count = 0
+        self._file = None
+        self._writer = None
+        self._buffer = []
+        self._buffer_rows = DEFAULT_BUFFER_ROWS
+
+    def matches_location(self, invited_location):
+        return self.location_filter == "all" or invited_location.lower() == self.location_filter.lower()
+
+    def query(self):
+        """Mongo filter matching every invite that can contribute a row to this export"""
+        query = {}
+        if self.location_filter != "all":
+            # invitedLocation is stored title-cased ('Canada', 'Australia'), see InviteSchema
+            query['invitedLocation'] = self.location_filter.title()
+        if self.guest_filter:
+            query['guests'] = {'$elemMatch': self.guest_filter}
+        return query
+
+    def start(self, buffer_rows=DEFAULT_BUFFER_ROWS):
+        """Open the CSV and write the header; rows are then streamed in as guests arrive"""
+        os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+        self._file = open(self.filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+        self._buffer = []
+        self._buffer_rows = buffer_rows
+        self.row_count = 0
+
+    def add(self, invite, guest):
+        row = self.make_row(invite, guest)
+        if row is None:
+            return
+        self._buffer.append(row)
+        self.row_count += 1
+        if len(self._buffer) >= self._buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows with a single writerows call"""
+        if self._buffer:
+            self._writer.writerows(self._buffer)
+            self._buffer.clear()
+
+    def finish(self):
+        """Flush remaining rows and close the CSV"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+def export_query(exports):
+    """Combined filter for several exports: invites any one of them needs"""
+    queries = [export.query() for export in exports]
+    if any(not query for query in queries):
+        return {}
+    return queries[0] if len(queries) == 1 else {'$or': queries}
+
+def export_projection(exports):
+    """Combined projection for several exports: only the fields they read"""
+    projection = {'_id': 0, 'invitedLocation': 1}
+    for export in exports:
+        for field in export.invite_fields:
+            projection[field] = 1
+        for field in export.guest_fields:
+            projection[f'guests.{field}'] = 1
+    return projection
+
+def run_exports(exports, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Scan the invites collection once and fan every guest out to each export.
+    Rows are written as the cursor is consumed (batch_size invites per round
+    trip), so memory stays flat no matter how many invites there are.
+    """
+    try:
+        for export in exports:
+            export.start()
+
+        invites = invite_collection.find(export_query(exports), export_projection(exports)).batch_size(batch_size)
+        for invite in invites:
+            invited_location = invite.get('invitedLocation', 'Unknown')
+            targets = [export for export in exports if export.matches_location(invited_location)]
+            if not targets:
+                continue
+            for guest in invite.get('guests', []):
+                for export in targets:
+                    export.add(invite, guest)
+    finally:
+        for export in exports:
+            export.finish()
+
+    for export in exports:
+        print(f"Exported {export.row_count} {export.description} to {export.filename}")
+
+def location_display_name(location_filter):
+    return location_filter.title() if location_filter != "all" else "All Locations"
 
-MONGO_USER = os.getenv('MONGO_USER')
-MONGO_PASS = os.getenv('MONGO_PASS')
-MONGO_CLUSTER = os.getenv('MONGO_CLUSTER')
+def location_filename(base, location_filter):
+    """Include location in filename if filtered"""
+    if location_filter == "all":
+        return f'out_db_calls/{base}.csv'
+    return f'out_db_calls/{base}_{location_filter.lower()}.csv'
+
+def dietary_export():
+    """Guests with meaningful dietary requirements"""
+    def make_row(invite, guest):
+        dietary = guest.get('dietaryRequirements', '')
+        if not (dietary.strip() and is_meaningful_dietary(dietary)):
+            return None
+        return {
+            'firstName': guest.get('firstName', ''),
+            'lastName': guest.get('lastName', ''),
+            'dietaryRequirements': dietary,
+            'invitedLocation': invite.get('invitedLocation', 'Unknown')
+        }
+
+    return GuestExport(
+        'out_db_calls/guests_with_dietary_requirements_cleaned.csv',
+        ['firstName', 'lastName', 'dietaryRequirements', 'invitedLocation'],
+        make_row,
+        "guests with meaningful dietary requirements",
+        guest_fields=['firstName', 'lastName', 'dietaryRequirements'],
+        guest_filter={'dietaryRequirements': {'$nin': ['', None]}}
+    )
+
+def rsvp_export(location_filter="all"):
+    """Guests who have RSVP'd (responded with any status)"""
+    def make_row(invite, guest):
+        attending_status = guest.get('attendingStatus', '')
+        # Only include guests who have responded (attendingStatus is not empty)
+        if not attending_status.strip():
+            return None
+        return {
+            'firstName': guest.get('firstName', ''),
+            'lastName': guest.get('lastName', ''),
+            'attendingStatus': attending_status,
+            'invitedLocation': invite.get('invitedLocation', 'Unknown')
+        }
+
+    return GuestExport(
+        location_filename('guests_who_have_rsvpd', location_filter),
+        ['firstName', 'lastName', 'attendingStatus', 'invitedLocation'],
+        make_row,
+        f"guests who have RSVP'd from {location_display_name(location_filter)}",
+        location_filter,
+        guest_fields=['firstName', 'lastName', 'attendingStatus'],
+        guest_filter={'attendingStatus': {'$nin': ['', None]}}
+    )
 
-if not all([MONGO_USER, MONGO_PASS, MONGO_CLUSTER]):
-    raise Exception("Missing one or more required MongoDB environment variables.")
+def attending_export(location_filter="all"):
+    """Guests who have RSVP'd as attending (Australia or Canada)"""
+    def make_row(invite, guest):
+        attending_status = guest.get('attendingStatus', '')
+        if not (attending_status.strip() and attending_status in ATTENDING_STATUSES):
+            return None
+        return {
+            'firstName': guest.get('firstName', ''),
+            'lastName': guest.get('lastName', ''),
+            'attendingStatus': attending_status,
+            'invitedLocation': invite.get('invitedLocation', 'Unknown')
+        }
 
-mongo_uri = f"mongodb+srv://{MONGO_USER}:{MONGO_PASS}@{MONGO_CLUSTER}.mongodb.net/db?retryWrites=true&w=majority"
+    return GuestExport(
+        location_filename('guests_attending', location_filter),
+        ['firstName', 'lastName', 'attendingStatus', 'invitedLocation'],
+        make_row,
+        f"guests who have RSVP'd as attending from {location_display_name(location_filter)}",
+        location_filter,
+        guest_fields=['firstName', 'lastName', 'attendingStatus'],
+        guest_filter={'attendingStatus': {'$in': ATTENDING_STATUSES}}
+    )
 
-client = MongoClient(mongo_uri)
-db = client['db']
-invite_collection = db['invites']
-photo_collection = db['photos']
+def all_invites_export(location_filter="all"):
+    """All invites and their guests"""
+    def make_row(invite, guest):
+        return {
+            'inviteId': str(invite.get('_id', '')),
+            'firstName': guest.get('firstName', ''),
+            'lastName': guest.get('lastName', ''),
+            'attendingStatus': guest.get('attendingStatus', ''),
+            'dietaryRequirements': guest.get('dietaryRequirements', ''),
+            'invitedLocation': invite.get('invitedLocation', 'Unknown'),
+            'givenPlusOne': invite.get('givenPlusOne', False)
+        }
 
-# List of values to treat as 'no dietary restriction', all cleaned (lowercase, no punctuation, no spaces)
-EXCLUDE_DIETARY = {"no", "none", "na", "nil", "nope", "notattending", "norestrictions"}
+    return GuestExport(
+        location_filename('all_invites', location_filter),
+        ['inviteId', 'firstName', 'lastName', 'attendingStatus', 'dietaryRequirements', 'invitedLocation', 'givenPlusOne'],
+        make_row,
+        f"guests from all invites in {location_display_name(location_filter)}",
+        location_filter,
+        guest_fields=['firstName', 'lastName', 'attendingStatus', 'dietaryRequirements'],
+        invite_fields=['_id', 'givenPlusOne']
+    )
 
-def is_meaningful_dietary(val):
-    """Check if dietary requirement is meaningful (not empty or generic 'no' response)"""
-    # Remove punctuation, lowercase, and strip
-    cleaned = re.sub(r'[^a-zA-Z0-9 ]', '', val).strip().lower().replace(' ', '')
-    return cleaned and cleaned not in EXCLUDE_DIETARY
+EXPORTS = {
+    'dietary': dietary_export,
+    'rsvp': rsvp_export,
+    'attending': attending_export,
+    'all_invites': all_invites_export
+}
 
-def export_dietary_requirements():
+def export_dietary_requirements(batch_size=DEFAULT_BATCH_SIZE):
     """Export guests with meaningful dietary requirements"""
     print("Fetching guests with dietary requirements...")
-    
-    # Query all invites
-    invites = invite_collection.find({})
-    
-    rows = []
-    for invite in invites:
-        invited_location = invite.get('invitedLocation', 'Unknown')
-        guests = invite.get('guests', [])
-        
-        for guest in guests:
-            first = guest.get('firstName', '')
-            last = guest.get('lastName', '')
-            dietary = guest.get('dietaryRequirements', '')
-            
-            if dietary.strip() and is_meaningful_dietary(dietary):
-                rows.append({
-                    'firstName': first,
-                    'lastName': last,
-                    'dietaryRequirements': dietary,
-                    'invitedLocation': invited_location
-                })
-    
-    # Write to CSV
-    os.makedirs('out_db_calls', exist_ok=True)
-    filename = 'out_db_calls/guests_with_dietary_requirements_cleaned.csv'
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['firstName', 'lastName', 'dietaryRequirements', 'invitedLocation']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-    
-    print(f"Exported {len(rows)} guests with meaningful dietary requirements to {filename}")
+    run_exports([dietary_export()], batch_size)
 
-def export_rsvp_responses(location_filter="all"):
+def export_rsvp_responses(location_filter="all", batch_size=DEFAULT_BATCH_SIZE):
     """Export all guests who have RSVP'd (responded with any status)"""
-    location_display = location_filter.title() if location_filter != "all" else "All Locations"
-    print(f"Fetching guests who have RSVP'd from {location_display}...")
-    
-    # Query all invites
-    invites = invite_collection.find({})
-    
-    rows = []
-    for invite in invites:
-        invited_location = invite.get('invitedLocation', 'Unknown')
-        
-        # Apply location filter
-        if location_filter != "all":
-            if invited_location.lower() != location_filter.lower():
-                continue
-        
-        guests = invite.get('guests', [])
-        
-        for guest in guests:
-            first = guest.get('firstName', '')
-            last = guest.get('lastName', '')
-            attending_status = guest.get('attendingStatus', '')
-            
-            # Only include guests who have responded (attendingStatus is not empty)
-            if attending_status.strip():
-                rows.append({
-                    'firstName': first,
-                    'lastName': last,
-                    'attendingStatus': attending_status,
-                    'invitedLocation': invited_location
-                })
-    
-    # Write to CSV
-    os.makedirs('out_db_calls', exist_ok=True)
-    
-    # Include location in filename if filtered
-    if location_filter == "all":
-        filename = 'out_db_calls/guests_who_have_rsvpd.csv'
-    else:
-        filename = f'out_db_calls/guests_who_have_rsvpd_{location_filter.lower()}.csv'
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['firstName', 'lastName', 'attendingStatus', 'invitedLocation']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-    
-    print(f"Exported {len(rows)} guests who have RSVP'd from {location_display} to {filename}")
+    print(f"Fetching guests who have RSVP'd from {location_display_name(location_filter)}...")
+    run_exports([rsvp_export(location_filter)], batch_size)
 
-def export_attending_guests(location_filter="all"):
+def export_attending_guests(location_filter="all", batch_size=DEFAULT_BATCH_SIZE):
     """Export guests who have RSVP'd as attending (Australia or Canada)"""
-    location_display = location_filter.title() if location_filter != "all" else "All Locations"
-    print(f"Fetching guests who have RSVP'd as attending from {location_display}...")
-    
-    # Define the attending status values based on the schema
-    attending_statuses = ['Canada Only', 'Australia Only', 'Both Australia and Canada']
-    
-    # Query all invites
-    invites = invite_collection.find({})
-    
-    rows = []
-    for invite in invites:
-        invited_location = invite.get('invitedLocation', 'Unknown')
-        
-        # Apply location filter
-        if location_filter != "all":
-            if invited_location.lower() != location_filter.lower():
-                continue
-        
-        guests = invite.get('guests', [])
-        
-        for guest in guests:
-            first = guest.get('firstName', '')
-            last = guest.get('lastName', '')
-            attending_status = guest.get('attendingStatus', '')
-            
-            # Only include guests who have RSVP'd as attending
-            if attending_status.strip() and attending_status in attending_statuses:
-                rows.append({
-                    'firstName': first,
-                    'lastName': last,
-                    'attendingStatus': attending_status,
-                    'invitedLocation': invited_location
-                })
-    
-    # Write to CSV
-    os.makedirs('out_db_calls', exist_ok=True)
-    
-    # Include location in filename if filtered
-    if location_filter == "all":
-        filename = 'out_db_calls/guests_attending.csv'
-    else:
-        filename = f'out_db_calls/guests_attending_{location_filter.lower()}.csv'
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['firstName', 'lastName', 'attendingStatus', 'invitedLocation']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-    
-    print(f"Exported {len(rows)} guests who have RSVP'd as attending from {location_display} to {filename}")
+    print(f"Fetching guests who have RSVP'd as attending from {location_display_name(location_filter)}...")
+    run_exports([attending_export(location_filter)], batch_size)
 
-def export_all_invites(location_filter="all"):
+def export_all_invites(location_filter="all", batch_size=DEFAULT_BATCH_SIZE):
     """Export all invites and their guests"""
-    location_display = location_filter.title() if location_filter != "all" else "All Locations"
-    print(f"Fetching all invites from {location_display}...")
-    
-    # Query all invites
-    invites = invite_collection.find({})
-    
-    rows = []
-    for invite in invites:
-        invited_location = invite.get('invitedLocation', 'Unknown')
-        
-        # Apply location filter
-        if location_filter != "all":
-            if invited_location.lower() != location_filter.lower():
-                continue
-        
-        invite_id = str(invite.get('_id', ''))
-        given_plus_one = invite.get('givenPlusOne', False)
-        guests = invite.get('guests', [])
-        
-        for guest in guests:
-            first = guest.get('firstName', '')
-            last = guest.get('lastName', '')
-            attending_status = guest.get('attendingStatus', '')
-            dietary = guest.get('dietaryRequirements', '')
-            
-            rows.append({
-                'inviteId': invite_id,
-                'firstName': first,
-                'lastName': last,
-                'attendingStatus': attending_status,
-                'dietaryRequirements': dietary,
-                'invitedLocation': invited_location,
-                'givenPlusOne': given_plus_one
-            })
-    
-    # Write to CSV
-    os.makedirs('out_db_calls', exist_ok=True)
-    
-    # Include location in filename if filtered
-    if location_filter == "all":
-        filename = 'out_db_calls/all_invites.csv'
-    else:
-        filename = f'out_db_calls/all_invites_{location_filter.lower()}.csv'
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['inviteId', 'firstName', 'lastName', 'attendingStatus', 'dietaryRequirements', 'invitedLocation', 'givenPlusOne']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-    
-    print(f"Exported {len(rows)} guests from all invites in {location_display} to {filename}")
+    print(f"Fetching all invites from {location_display_name(location_filter)}...")
+    run_exports([all_invites_export(location_filter)], batch_size)
 
-def reset_invite(invite_id, given_plus_one=None):
-    """Reset specific fields for an invite and optionally update givenPlusOne"""
-    print(f"Resetting invite with ID: {invite_id}")
-    
-    # Convert string ID to ObjectId
-    try:
-        object_id = ObjectId(invite_id)
-    except Exception as e:
-        print(f"Error: Invalid invite ID format: {invite_id}")
-        return False
-    
-    # Build the update document for invite-level fields
+def export_all(export_names=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run several exports from a single scan of the invites collection.
+    Every location-aware export is written for all, canada and australia.
+    """
+    exports = []
+    for name in export_names or EXPORTS:
+        if name == 'dietary':
+            exports.append(dietary_export())
+        else:
+            exports.extend(EXPORTS[name](location) for location in LOCATION_CHOICES)
+
+    print(f"Running {len(exports)} exports from a single scan of the invites collection...")
+    run_exports(exports, batch_size)
+
+# --status filters for reset_invite, matched against the invite or any of its guests
+RESET_STATUS_FILTERS = {
+    'rsvpd': {'hasRSVPd': True},
+    'attending': {'guests.attendingStatus': {'$in': ATTENDING_STATUSES}},
+    'not_attending': {'guests.attendingStatus': 'Not Attending'},
+}
+
+def reset_update(given_plus_one=None):
+    """
+    Update document that resets an invite's RSVP. guests.$[] clears every
+    guest's attendingStatus in place, so the invite never has to be read first.
+    updatedAt is bumped the way Mongoose would, so watermark readers see the reset.
+    """
     update_fields = {
         'numGuestsMorningBreakfast': -1,
         'numGuestsOnBus': -1,
         'guestAccommodationAddress': '',
         'guestAccommodationLocalName': '',
-        'hasRSVPd': False
+        'hasRSVPd': False,
+        'guests.$[].attendingStatus': ''
     }
-    
-    # Add givenPlusOne if specified
     if given_plus_one is not None:
         update_fields['givenPlusOne'] = given_plus_one
+    return {'$set': update_fields, '$currentDate': {'updatedAt': True}}
+
+def reset_filter(location_filter="all", status_filter=None):
+    """Invite query for resetting by location and/or RSVP status"""
+    query = {}
+    if location_filter != "all":
+        query['invitedLocation'] = location_filter.title()
+    if status_filter:
+        query.update(RESET_STATUS_FILTERS[status_filter])
+    return query
+
+def read_invite_ids(path):
+    """
+    Invite IDs from a file: one per line (blank lines and # comments ignored),
+    or a CSV with an inviteId column such as the all_invites export
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        first_line = f.readline()
+        f.seek(0)
+        if 'inviteId' in first_line:
+            return [row['inviteId'].strip() for row in csv.DictReader(f) if row.get('inviteId', '').strip()]
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def reset_invites(invite_ids=None, invite_filter=None, given_plus_one=None):
+    """
+    Reset many invites in one bulk_write: one UpdateOne per invite ID, or a
+    single UpdateMany for invite_filter. Returns matched/modified counts.
+    """
+    operations = []
+    invalid_ids = []
+    update = reset_update(given_plus_one)
+
+    if invite_ids:
+        # Duplicates would only be matched twice; keep the first occurrence
+        for invite_id in dict.fromkeys(invite_ids):
+            try:
+                operations.append(UpdateOne({'_id': ObjectId(invite_id)}, update))
+            except Exception:
+                invalid_ids.append(invite_id)
+        for invite_id in invalid_ids:
+            print(f"Error: Invalid invite ID format: {invite_id}")
+    elif invite_filter is not None:
+        operations.append(UpdateMany(invite_filter, update))
+
+    if not operations:
+        return {'requested': len(invalid_ids), 'invalid': len(invalid_ids), 'matched': 0, 'modified': 0}
+
+    result = invite_collection.bulk_write(operations, ordered=False)
+    return {
+        'requested': len(operations) + len(invalid_ids) if invite_ids else None,
+        'invalid': len(invalid_ids),
+        'matched': result.matched_count,
+        'modified': result.modified_count,
+    }
+
+def reset_invite(invite_id, given_plus_one=None):
+    """Reset specific fields for an invite and optionally update givenPlusOne"""
+    print(f"Resetting invite with ID: {invite_id}")
     
-    # First, get the current invite to access its guests
-    invite = invite_collection.find_one({'_id': object_id})
-    if not invite:
+    counts = reset_invites([invite_id], given_plus_one=given_plus_one)
+    if counts['invalid']:
+        return False
+    if counts['matched'] == 0:
         print(f"Error: No invite found with ID {invite_id}")
         return False
     
-    # Reset attendingStatus for each guest
-    guests = invite.get('guests', [])
-    updated_guests = []
-    for guest in guests:
-        updated_guest = guest.copy()
-        updated_guest['attendingStatus'] = ''
-        updated_guests.append(updated_guest)
-    
-    # Add the updated guests to the update fields
-    update_fields['guests'] = updated_guests
-    
-    # Update the invite
-    result = invite_collection.update_one(
-        {'_id': object_id},
-        {'$set': update_fields}
-    )
-    
-    if result.modified_count == 0:
-        print(f"Warning: Invite {invite_id} found but no changes were made")
-        return True
+    print(f"Successfully reset invite {invite_id}")
+    if given_plus_one is not None:
+        print(f"Updated givenPlusOne to: {given_plus_one}")
+    return True
+
+def bulk_reset_invites(invite_ids=None, location_filter="all", status_filter=None, given_plus_one=None, assume_yes=False):
+    """Reset invites by ID list, or every invite matching a location/status filter"""
+    if invite_ids:
+        print(f"Resetting {len(invite_ids)} invites...")
+        counts = reset_invites(invite_ids, given_plus_one=given_plus_one)
+        missing = counts['requested'] - counts['invalid'] - counts['matched']
+        if missing:
+            print(f"Warning: {missing} invite IDs did not match any invite")
     else:
-        print(f"Successfully reset invite {invite_id}")
-        print(f"Reset attendingStatus for {len(updated_guests)} guests")
-        if given_plus_one is not None:
-            print(f"Updated givenPlusOne to: {given_plus_one}")
-        return True
+        query = reset_filter(location_filter, status_filter)
+        description = location_display_name(location_filter) + (f" ({status_filter})" if status_filter else "")
+        if not assume_yes:
+            invite_count = invite_collection.count_documents(query)
+            if invite_count == 0:
+                print(f"No invites found for {description}")
+                return
+            confirm = input(f"Are you sure you want to reset all {invite_count} invites from {description}? (yes/no): ")
+            if confirm.lower() != 'yes':
+                print("Reset cancelled.")
+                return
+        counts = reset_invites(invite_filter=query, given_plus_one=given_plus_one)
+
+    print(f"Matched {counts['matched']} invites, modified {counts['modified']}")
+    if given_plus_one is not None:
+        print(f"Updated givenPlusOne to: {given_plus_one}")
+    return counts
 
 def delete_all_photos(location_filter="all"):
-    """Delete all photos from the database"""
+    """Delete all photos (and their Cloudinary assets, if configured) from the database"""
     location_display = location_filter.title() if location_filter != "all" else "All Locations"
     print(f"Deleting all photos from {location_display}...")
     
-    # Build the query based on location filter
-    if location_filter == "all":
-        query = {}
-    else:
-        query = {"location": location_filter.lower()}
+    # Build the query based on location filter (locations are stored as 'Canada'/'Australia')
+    query = purge_query(location_filter)
     
     # Count photos before deletion
     photo_count = photo_collection.count_documents(query)
@@ -323,31 +448,58 @@ def delete_all_photos(location_filter="all"):
         print(f"No photos found for {location_display}")
         return
     
-    # Confirm deletion
-    print(f"Found {photo_count} photos to delete from {location_display}")
-    confirm = input(f"Are you sure you want to delete all {photo_count} photos from {location_display}? (yes/no): ")
+    cloudinary = CloudinaryClient.from_env()
+    if cloudinary is None:
+        print("Warning: Cloudinary credentials are not set; only database rows will be deleted")
     
-    if confirm.lower() != 'yes':
-        print("Deletion cancelled.")
-        return
-    
-    # Delete the photos
-    result = photo_collection.delete_many(query)
-    
-    print(f"Successfully deleted {result.deleted_count} photos from {location_display}")
+    try:
+        # Confirm deletion
+        print(f"Found {photo_count} photos to delete from {location_display}")
+        confirm = input(f"Are you sure you want to delete all {photo_count} photos from {location_display}? (yes/no): ")
+        
+        if confirm.lower() != 'yes':
+            print("Deletion cancelled.")
+            return
+        
+        # Delete the photos in _id-ordered batches (see photo_purge.py for date/uploader filters and dry runs)
+        stats = purge_photos(photo_collection, query, cloudinary)
+        
+        print(f"Successfully deleted {stats.rows_deleted} photos from {location_display}")
+        if stats.assets_failed:
+            print(f"Warning: {stats.assets_failed} Cloudinary assets could not be deleted; their photos were kept")
+    finally:
+        if cloudinary:
+            cloudinary.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Wedding database query tool')
     parser.add_argument('--function', '-f', 
-                       choices=['dietary', 'rsvp', 'attending', 'all_invites', 'reset_invite', 'delete_photos'], 
+                       choices=['dietary', 'rsvp', 'attending', 'all_invites', 'export_all', 'reset_invite', 'delete_photos'], 
                        required=True,
-                       help='Function to run: dietary (guests with dietary requirements), rsvp (guests who have responded), attending (guests who have RSVP\'d as attending), all_invites (all invites), reset_invite (reset specific invite fields), or delete_photos (delete all photos)')
+                       help='Function to run: dietary (guests with dietary requirements), rsvp (guests who have responded), attending (guests who have RSVP\'d as attending), all_invites (all invites), export_all (every export in one pass), reset_invite (reset specific invite fields), or delete_photos (delete all photos)')
     parser.add_argument('--location', '-l',
-                       choices=['all', 'canada', 'australia'],
+                       choices=LOCATION_CHOICES,
                        default='all',
-                       help='Location filter for RSVP, attending, invites, and delete_photos functions (default: all)')
+                       help='Location filter for RSVP, attending, invites, reset_invite and delete_photos functions (default: all)')
+    parser.add_argument('--exports', '-e',
+                       nargs='+',
+                       choices=list(EXPORTS),
+                       help='Exports to write for export_all (default: all of them)')
+    parser.add_argument('--batch_size', '-b',
+                       type=int,
+                       default=DEFAULT_BATCH_SIZE,
+                       help=f'Invites fetched per cursor round trip for exports (default: {DEFAULT_BATCH_SIZE})')
     parser.add_argument('--invite_id', '-i',
-                       help='Invite ID for reset_invite function')
+                       nargs='+',
+                       help='Invite ID(s) for reset_invite function')
+    parser.add_argument('--invite_file',
+                       help='File of invite IDs for reset_invite (one per line, or a CSV with an inviteId column)')
+    parser.add_argument('--status', '-s',
+                       choices=list(RESET_STATUS_FILTERS),
+                       help='RSVP status filter for reset_invite when no IDs are given')
+    parser.add_argument('--yes', '-y',
+                       action='store_true',
+                       help='Skip the confirmation prompt for filtered reset_invite')
     parser.add_argument('--given_plus_one', '-g',
                        choices=['true', 'false'],
                        help='Set givenPlusOne value for reset_invite function (true/false)')
@@ -355,24 +507,34 @@ def main():
     args = parser.parse_args()
     
     if args.function == 'dietary':
-        export_dietary_requirements()
+        export_dietary_requirements(args.batch_size)
     elif args.function == 'rsvp':
-        export_rsvp_responses(args.location)
+        export_rsvp_responses(args.location, args.batch_size)
     elif args.function == 'attending':
-        export_attending_guests(args.location)
+        export_attending_guests(args.location, args.batch_size)
     elif args.function == 'all_invites':
-        export_all_invites(args.location)
+        export_all_invites(args.location, args.batch_size)
+    elif args.function == 'export_all':
+        export_all(args.exports, args.batch_size)
     elif args.function == 'reset_invite':
-        if not args.invite_id:
-            print("Error: --invite_id is required for reset_invite function")
+        invite_ids = list(args.invite_id or [])
+        if args.invite_file:
+            invite_ids += read_invite_ids(args.invite_file)
+        if not invite_ids and args.location == 'all' and not args.status:
+            print("Error: reset_invite needs --invite_id, --invite_file, or a --location/--status filter")
             return
+        if invite_ids and (args.location != 'all' or args.status):
+            parser.error("reset_invite takes invite IDs or a --location/--status filter, not both")
         
         # Convert given_plus_one string to boolean if provided
         given_plus_one_bool = None
         if args.given_plus_one:
             given_plus_one_bool = args.given_plus_one.lower() == 'true'
         
-        reset_invite(args.invite_id, given_plus_one_bool)
+        if len(invite_ids) == 1:
+            reset_invite(invite_ids[0], given_plus_one_bool)
+        else:
+            bulk_reset_invites(invite_ids, args.location, args.status, given_plus_one_bool, args.yes)
     elif args.function == 'delete_photos':
         delete_all_photos(args.location)
 
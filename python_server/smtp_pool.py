@@ -0,0 +1,230 @@
+"""
+Pooled, persistent SMTP sessions for the bulk email senders.
+
+Opening a fresh smtplib.SMTP connection per message means every email pays
+for a TCP connect, STARTTLS and AUTH LOGIN. SMTPPool keeps up to `size`
+authenticated sessions open and reuses them across messages, so a bulk send
+only pays those handshakes once per session.
+
+- Sessions are opened lazily, on first use
+- Idle sessions are handed out most-recently-used first, so a serial sender
+  keeps reusing one warm connection instead of opening all of them
+- A session that drops (timeout, server disconnect) is reconnected and the
+  message retried transparently. A 421 reply closes the session but is raised
+  to the caller without resending: Gmail uses it for rate limiting, so the
+  retry has to wait for throttle.AdaptiveRateLimiter's backoff
+- Per-session throughput is tracked and can be logged with log_stats()
+- classify_smtp_error sorts send failures into rate limiting, daily quota,
+  transient and permanent, for throttle.AdaptiveRateLimiter and retry queues
+
+Usage:
+    with SMTPPool("smtp.gmail.com", 587, user, password, size=3) as pool:
+        pool.send_message(msg)
+"""
+
+import logging
+import queue
+import smtplib
+import time
+
+# 421 = "Service not available, closing transmission channel" - the server
+# has dropped (or is about to drop) the session, so it is closed and reopened
+# on the next send. The message is not resent here: see RATE_LIMIT_CODES
+CLOSE_SESSION_CODES = {421}
+
+# Gmail's rate limiting: 421 4.7.0 "Try again later" and 454 4.7.0 "Too many
+# login attempts". Sending must slow down before retrying.
+RATE_LIMIT_CODES = {421, 454}
+
+# 550 5.4.5 "Daily user sending quota exceeded" - nothing more will go out today
+QUOTA_MARKERS = ('5.4.5', 'quota exceeded', 'sending limit exceeded')
+
+# Outcomes of a send, see classify_smtp_error
+SENT = 'sent'
+THROTTLED = 'throttled'
+QUOTA = 'quota'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+RETRYABLE = {THROTTLED, TRANSIENT}
+
+
+def smtp_error_code(error):
+    """(SMTP reply code, reply text) carried by an smtplib exception, or (None, str(error))"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        # Every recipient was refused; the first one's reply is representative
+        code, message = next(iter(error.recipients.values()))
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code, message = error.smtp_code, error.smtp_error
+    else:
+        return None, str(error)
+    if isinstance(message, bytes):
+        message = message.decode(errors='replace')
+    return code, message
+
+
+def classify_smtp_error(error):
+    """
+    THROTTLED, QUOTA, TRANSIENT or PERMANENT for an exception raised while
+    sending: rate-limit replies slow the sender down, other 4xx replies and
+    dropped connections are retried later, and other 5xx replies (unknown
+    mailbox, rejected content, bad credentials) are final.
+    """
+    code, message = smtp_error_code(error)
+    if code is None:
+        dropped = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, TimeoutError, ConnectionError, OSError)
+        return TRANSIENT if isinstance(error, dropped) else PERMANENT
+    if code in RATE_LIMIT_CODES:
+        return THROTTLED
+    if code >= 500 and any(marker in message.lower() for marker in QUOTA_MARKERS):
+        return QUOTA
+    return TRANSIENT if 400 <= code < 500 else PERMANENT
+
+
+class SMTPSession:
+    """A single authenticated SMTP connection and its throughput counters"""
+
+    def __init__(self, session_id, host, port, username, password, timeout=30):
+        self.session_id = session_id
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.server = None
+
+        self.messages_sent = 0
+        self.failures = 0
+        self.reconnects = 0
+        self.busy_seconds = 0.0
+        self.opened_at = None
+
+    @property
+    def connected(self):
+        return self.server is not None
+
+    def connect(self):
+        """Opens the connection, upgrades it with STARTTLS and logs in"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        if self.opened_at is None:
+            self.opened_at = time.monotonic()
+        logging.debug(f"SMTP session {self.session_id} connected to {self.host}:{self.port}")
+
+    def close(self):
+        """Closes the connection, ignoring errors from an already dropped socket"""
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+    def send(self, msg):
+        """Sends a message on this session, connecting first if needed"""
+        if self.server is None:
+            self.connect()
+        started = time.monotonic()
+        try:
+            self.server.send_message(msg)
+        finally:
+            self.busy_seconds += time.monotonic() - started
+        self.messages_sent += 1
+
+    def stats(self):
+        """Returns throughput counters for this session"""
+        elapsed = time.monotonic() - self.opened_at if self.opened_at else 0.0
+        return {
+            'session': self.session_id,
+            'messages_sent': self.messages_sent,
+            'failures': self.failures,
+            'reconnects': self.reconnects,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'messages_per_sec': round(self.messages_sent / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class SMTPPool:
+    """Thread-safe pool of persistent, authenticated SMTP sessions"""
+
+    def __init__(self, host, port, username, password, size=3, timeout=30, max_retries=2):
+        if size < 1:
+            raise ValueError("SMTP pool size must be at least 1")
+        self.host = host
+        self.port = port
+        self.size = size
+        self.max_retries = max_retries
+        self._sessions = [
+            SMTPSession(i, host, port, username, password, timeout=timeout)
+            for i in range(size)
+        ]
+        # LIFO so a serial caller keeps reusing the same warm session
+        self._idle = queue.LifoQueue()
+        for session in reversed(self._sessions):
+            self._idle.put(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def send_message(self, msg):
+        """
+        Sends a message on an idle session, blocking until one is free.
+
+        Dropped sessions (timeouts, disconnects) are reconnected and the send
+        retried up to max_retries times. A 421 reply closes the session and is
+        raised without resending, so the caller can back off first. Any other
+        SMTP error is raised to the caller unchanged.
+        """
+        session = self._idle.get()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    session.send(msg)
+                    return
+                except smtplib.SMTPResponseException as e:
+                    session.failures += 1
+                    if e.smtp_code in CLOSE_SESSION_CODES:
+                        # The server is closing the channel; the next send opens a fresh session
+                        session.close()
+                        session.reconnects += 1
+                    raise
+                except (smtplib.SMTPServerDisconnected, TimeoutError, ConnectionError) as e:
+                    if attempt == self.max_retries:
+                        session.failures += 1
+                        raise
+                    logging.warning(f"SMTP session {session.session_id} dropped ({e}), reconnecting")
+                except Exception:
+                    session.failures += 1
+                    raise
+
+                # Drop the broken connection; send() reconnects on the next attempt
+                session.close()
+                session.reconnects += 1
+        finally:
+            self._idle.put(session)
+
+    def stats(self):
+        """Returns per-session throughput for every session that has been opened"""
+        return [s.stats() for s in self._sessions if s.opened_at is not None]
+
+    def log_stats(self):
+        for s in self.stats():
+            logging.info(
+                f"SMTP session {s['session']}: {s['messages_sent']} sent, "
+                f"{s['failures']} failed, {s['reconnects']} reconnects, "
+                f"{s['messages_per_sec']} msg/s"
+            )
+
+    def close(self):
+        """Closes every open session"""
+        for session in self._sessions:
+            session.close()
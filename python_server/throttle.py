@@ -0,0 +1,210 @@
+"""
+Rate limiting helpers shared by the bulk senders.
+
+RateLimiter is a thread-safe token bucket: callers block in acquire() until
+a token is available, so a pool of worker threads collectively stays under
+`rate` operations per second no matter how many workers there are.
+
+AdaptiveRateLimiter adjusts that rate to the server's responses: it halves
+the rate and pauses after a rate-limit reply, then creeps back up after
+successful sends (additive increase, multiplicative decrease). RetryQueue
+holds deferred work until it is due, and SendMetrics counts what a run did.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per second (None = unlimited)"""
+
+    def __init__(self, rate=None, burst=1):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive (or None for unlimited)")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it"""
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class QuotaExceeded(Exception):
+    """Raised by AdaptiveRateLimiter.acquire once the server reports the sending quota is used up"""
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate follows the server's feedback, reported through
+    record() with the outcome of each send:
+
+      'sent'                   rate += increase, up to max_rate
+      'throttled'              rate *= decrease (not below min_rate) and every
+                               caller pauses for `cooldown` seconds, doubling on
+                               each consecutive throttle up to max_cooldown
+      'quota'                  acquire() raises QuotaExceeded from then on
+
+    With rate=None the limiter is unlimited until the first throttle, which
+    starts it at half the rate achieved so far.
+    """
+
+    def __init__(self, rate=None, burst=1, min_rate=0.05, max_rate=None, increase=0.05,
+                 decrease=0.5, cooldown=5.0, max_cooldown=300.0):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.quota_exceeded = False
+        self._paused_until = 0.0
+        self._acquired = 0
+        self._started = time.monotonic()
+
+    def acquire(self):
+        """Waits out any pause, then blocks until a token is available"""
+        while True:
+            with self._lock:
+                if self.quota_exceeded:
+                    raise QuotaExceeded("Sending quota exceeded; resume the campaign later")
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0:
+                    self._acquired += 1
+                    break
+            time.sleep(wait)
+        super().acquire()
+
+    def record(self, outcome):
+        """Adapts the rate to the outcome of a send (see smtp_pool: 'sent', 'throttled', 'quota', ...)"""
+        with self._lock:
+            if outcome == 'sent':
+                self.cooldown = self.base_cooldown
+                if self.rate is not None:
+                    limit = self.max_rate if self.max_rate is not None else float('inf')
+                    self.rate = min(limit, self.rate + self.increase)
+            elif outcome == 'throttled':
+                self._throttle()
+            elif outcome == 'quota':
+                self.quota_exceeded = True
+
+    def _throttle(self):
+        if self.rate is None:
+            elapsed = time.monotonic() - self._started
+            achieved = self._acquired / elapsed if elapsed > 0 else self.min_rate
+            self.rate = achieved
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        now = time.monotonic()
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = now
+        self._paused_until = max(self._paused_until, now + self.cooldown)
+        logging.warning(f"Rate limited by the server: pausing {self.cooldown:.0f}s, then {self.rate:.2f}/s")
+        self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+
+
+class RetryQueue:
+    """Thread-safe queue of items that become due after a delay"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()  # FIFO among items due at the same time
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+    def push(self, item, delay):
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item))
+
+    def pop_due(self):
+        """Every item whose delay has passed, oldest first"""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def drain(self):
+        """Yields batches of due items, sleeping until the next one is due, until the queue is empty"""
+        while True:
+            with self._lock:
+                if not self._heap:
+                    return
+                wait = self._heap[0][0] - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            due = self.pop_due()
+            if due:
+                yield due
+
+
+class SendMetrics:
+    """Thread-safe per-run counters for a bulk send"""
+
+    def __init__(self):
+        self.sent = 0
+        self.deferred = 0
+        self.throttled = 0
+        self.retried = 0
+        self.permanent_failures = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, outcome):
+        """Counts the outcome of one send attempt"""
+        with self._lock:
+            if outcome == 'sent':
+                self.sent += 1
+            elif outcome == 'permanent':
+                self.permanent_failures += 1
+            else:
+                # throttled, quota and transient failures are all deferred for a later attempt or run
+                self.deferred += 1
+                if outcome == 'throttled':
+                    self.throttled += 1
+
+    def record_retries(self, count):
+        with self._lock:
+            self.retried += count
+
+    def summary(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                'sent': self.sent,
+                'sent_per_sec': round(self.sent / elapsed, 2) if elapsed > 0 else 0.0,
+                'deferred': self.deferred,
+                'throttled': self.throttled,
+                'retried': self.retried,
+                'permanent_failures': self.permanent_failures,
+                'elapsed_seconds': round(elapsed, 1),
+            }
+
+    def log(self):
+        s = self.summary()
+        logging.info(
+            f"Sent {s['sent']} emails in {s['elapsed_seconds']}s ({s['sent_per_sec']}/s): "
+            f"{s['deferred']} deferred ({s['throttled']} rate limited), {s['retried']} retries, "
+            f"{s['permanent_failures']} permanent failures"
+        )
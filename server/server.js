@@ -333,6 +333,51 @@ app.post('/api/invites', async (req, res) => {
   }
 });
 
+// Creates many invites in one round trip (used by the python invite senders).
+// Every invite is validated before anything is written, and the new IDs are
+// returned in the same order as the request body.
+const MAX_BULK_INVITES = 200;
+app.post('/api/invites/bulk', async (req, res) => {
+  const { invites } = req.body;
+
+  if (!invites || !Array.isArray(invites) || invites.length === 0) {
+    return res.status(400).json({ message: "No invites provided." });
+  }
+
+  if (invites.length > MAX_BULK_INVITES) {
+    return res.status(400).json({ message: `Cannot create more than ${MAX_BULK_INVITES} invites at once.` });
+  }
+
+  const docs = invites.map(({ guests, givenPlusOne, invitedLocation }) => new Invite({
+    guests,
+    givenPlusOne,
+    invitedLocation,
+    hasRSVPd: false
+  }));
+
+  const validationErrors = [];
+  docs.forEach((doc, index) => {
+    const error = doc.validateSync();
+    if (error) {
+      validationErrors.push(`Invite ${index + 1}: ${error.message}`);
+    }
+  });
+
+  if (validationErrors.length > 0) {
+    return res.status(400).json({
+      message: "Validation errors found",
+      errors: validationErrors
+    });
+  }
+
+  try {
+    const savedInvites = await Invite.insertMany(docs, { ordered: true });
+    res.status(201).json({ ids: savedInvites.map(invite => invite._id) });
+  } catch (error) {
+    res.status(400).json({ message: error.message });
+  }
+});
+
 app.delete('/api/invites/:id', async (req, res) => {
   try {
     const invite = await Invite.findByIdAndDelete(req.params.id);